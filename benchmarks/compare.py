@@ -0,0 +1,99 @@
+"""Comparison of two results of the benchmark suite.
+
+Run with ``python -m benchmarks.compare <baseline.json> <results.json>``.
+The exit status is 1 when any result got worse by more than the threshold,
+so the comparison can gate a change in CI.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+# Units of rates, every other unit is a time or a size, lower is better.
+HIGHER_IS_BETTER = frozenset({"ops/s", "updates/s"})
+
+
+def load(path: Path) -> dict[str, dict[str, Any]]:
+    """Return the results saved by the suite."""
+    return json.loads(path.read_text(encoding="utf-8"))["results"]
+
+
+def change(old: float, new: float, unit: str) -> float:
+    """Return how much worse the new value is, negative if it is better."""
+    if unit in HIGHER_IS_BETTER:
+        return old / new - 1 if new else float("inf")
+
+    return new / old - 1 if old else 0.0
+
+
+def compare(
+    baseline: dict[str, dict[str, Any]],
+    results: dict[str, dict[str, Any]],
+    threshold: float,
+) -> tuple[list[str], list[str]]:
+    """Return the report lines and the names of the regressed results."""
+    lines = [
+        f"{'benchmark':<40} {'baseline':>14} {'results':>14} "
+        f"{'unit':<10} {'better':>8}",
+    ]
+    regressions = []
+
+    for name in sorted(baseline.keys() | results.keys()):
+        if name not in baseline or name not in results:
+            present = results.get(name) or baseline[name]
+            side = "added" if name in results else "missing"
+            lines.append(
+                f"{name:<40} {present['value']:>14,.3f} {present['unit']:<10}"
+                f" {side}",
+            )
+            continue
+
+        old, new = baseline[name], results[name]
+        worse = change(old["value"], new["value"], new["unit"])
+        mark = ""
+        if worse > threshold:
+            mark = "REGRESSION"
+            regressions.append(name)
+        elif worse < -threshold:
+            mark = "improved"
+
+        lines.append(
+            f"{name:<40} {old['value']:>14,.3f} {new['value']:>14,.3f} "
+            f"{new['unit']:<10} {-worse:>+8.1%} {mark}",
+        )
+
+    return lines, regressions
+
+
+def main() -> None:
+    """Parse the arguments, print the comparison and exit on regressions."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("results", type=Path)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative change counted as a regression (default: 0.1)",
+    )
+    args = parser.parse_args()
+
+    lines, regressions = compare(
+        load(args.baseline),
+        load(args.results),
+        args.threshold,
+    )
+    for line in lines:
+        print(line)  # noqa: T201
+
+    if regressions:
+        print(f"{len(regressions)} results regressed")  # noqa: T201
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
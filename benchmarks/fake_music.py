@@ -0,0 +1,155 @@
+"""Local stand-in for the music site.
+
+Serves the saved pages as search results and top hits and answers audio
+downloads with generated files, with a configurable delay and size. Every
+search subdomain gets its own audio URLs so searches do not share tracks.
+Point the bot at it with ``MUSIC_URL=http://vuxo7.com:8083`` and
+``MUSIC_ADDRESS=127.0.0.1``. The call counts are reported on ``/stats``.
+
+Run with ``python -m benchmarks.fake_music``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+from pathlib import Path
+
+from aiohttp import web
+
+FIXTURES = Path(__file__).parent / "fixtures"
+AUDIO_HOST = "https://cdn.vuxo7.com/audio/"
+
+
+class FakeMusicSite:
+    """Music site serving saved pages and generated audio files."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8083,
+        domain: str = "vuxo7.com",
+        latency: float = 0.0,
+        audio_size: int = 256 * 1024,
+        fixtures: Path = FIXTURES,
+    ) -> None:
+        """Initialize the fake site."""
+        self.host = host
+        self.port = port
+        self.domain = domain
+        self.latency = latency
+        self.audio_size = audio_size
+        self.calls: Counter[str] = Counter()
+        self.served_bytes = 0
+        self._search = (fixtures / "search.html").read_text(encoding="utf-8")
+        self._top_hits = (fixtures / "top_hits.html").read_text(
+            encoding="utf-8",
+        )
+        self._audio = b"\0" * audio_size
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def base_url(self) -> str:
+        """Return the URL to use as ``MUSIC_URL``."""
+        return f"http://{self.domain}:{self.port}"
+
+    def create_app(self) -> web.Application:
+        """Create the aiohttp application of the fake site."""
+        app = web.Application()
+        app.router.add_get("/", self._page)
+        app.router.add_get("/audio/{path:.*}", self._file)
+        app.router.add_get("/stats", self._stats)
+        return app
+
+    async def start(self) -> None:
+        """Start serving on the configured address."""
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _page(self, request: web.Request) -> web.Response:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        subdomain = request.host.partition(":")[0].removesuffix(self.domain)
+        if subdomain:
+            self.calls["search"] += 1
+            html = self._search.replace(
+                AUDIO_HOST,
+                f"{self.base_url}/audio/{subdomain.rstrip('.')}/",
+            )
+        else:
+            self.calls["top_hits"] += 1
+            html = self._top_hits.replace(
+                AUDIO_HOST,
+                f"{self.base_url}/audio/",
+            )
+
+        return web.Response(text=html, content_type="text/html")
+
+    async def _file(self, _: web.Request) -> web.Response:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        self.calls["audio"] += 1
+        self.served_bytes += self.audio_size
+        return web.Response(body=self._audio, content_type="audio/mpeg")
+
+    async def _stats(self, _: web.Request) -> web.Response:
+        return web.json_response(
+            {"calls": dict(self.calls), "served_bytes": self.served_bytes},
+        )
+
+
+async def serve(  # noqa: PLR0913
+    host: str,
+    port: int,
+    domain: str,
+    latency: float,
+    audio_size: int,
+) -> None:
+    """Run the fake site until cancelled and print the call counts."""
+    site = FakeMusicSite(host, port, domain, latency, audio_size)
+    await site.start()
+    print(f"Fake music site listening on {site.base_url}")  # noqa: T201
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await site.stop()
+        for name, count in site.calls.most_common():
+            print(f"{name:<24} {count}")  # noqa: T201
+
+
+def main() -> None:
+    """Parse the arguments and run the fake site."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8083)
+    parser.add_argument("--domain", default="vuxo7.com")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--audio-size", type=int, default=256 * 1024)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(
+            serve(
+                args.host,
+                args.port,
+                args.domain,
+                args.latency,
+                args.audio_size,
+            ),
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Local stand-in for the Telegram Bot API.
+
+Answers every method the bot uses with a well-formed result and records
+the calls, so the bot can run under load without reaching Telegram. Point
+the bot at it with ``BOT_API_URL=http://127.0.0.1:8081``. The call counts
+and the sent audio are reported on ``/stats``.
+
+Run with ``python -m benchmarks.fake_telegram``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+from typing import Any
+
+from aiohttp import web
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+BOT_USER = {
+    "id": 1,
+    "is_bot": True,
+    "first_name": "Music Bot",
+    "username": "music_bot",
+}
+
+
+class FakeTelegramAPI:
+    """Bot API server that records calls instead of delivering them."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8081) -> None:
+        """Initialize the fake server."""
+        self.host = host
+        self.port = port
+        self.calls: Counter[str] = Counter()
+        self.uploaded_bytes = 0
+        self.markups: dict[int, dict[str, Any]] = {}
+        self.audio: list[dict[str, Any]] = []
+        self._ids = itertools.count(1)
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def base_url(self) -> str:
+        """Return the URL to use as ``BOT_API_URL``."""
+        return f"http://{self.host}:{self.port}"
+
+    def create_app(self) -> web.Application:
+        """Create the aiohttp application of the fake server."""
+        app = web.Application(client_max_size=100 * 1024 * 1024)
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        app.router.add_get("/file/bot{token}/{path:.*}", self._file)
+        app.router.add_get("/stats", self._stats)
+        return app
+
+    async def start(self) -> None:
+        """Start serving on the configured address."""
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+
+        data: dict[str, Any] = {}
+        uploaded = 0
+        if request.can_read_body:
+            form = await request.post()
+            for key, value in form.items():
+                if isinstance(value, web.FileField):
+                    while chunk := value.file.read(UPLOAD_CHUNK_SIZE):
+                        uploaded += len(chunk)
+                else:
+                    data[key] = value
+        self.uploaded_bytes += uploaded
+
+        if "reply_markup" in data:
+            # The last keyboard of each chat, to press its buttons next.
+            self.markups[int(data["chat_id"])] = json.loads(
+                data["reply_markup"],
+            )
+
+        if method == "sendAudio":
+            self.audio.append(
+                {
+                    "chat_id": int(data["chat_id"]),
+                    "performer": data.get("performer"),
+                    "title": data.get("title"),
+                    "uploaded_bytes": uploaded,
+                },
+            )
+
+        result = self._result(method, data)
+        return web.json_response({"ok": True, "result": result})
+
+    async def _stats(self, _: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "calls": dict(self.calls),
+                "uploaded_bytes": self.uploaded_bytes,
+                "audio": len(self.audio),
+            },
+        )
+
+    async def _file(self, _: web.Request) -> web.Response:
+        self.calls["file"] += 1
+        return web.Response(body=b"\xff\xd8\xff\xd9")
+
+    def _message(self, data: dict[str, Any], **fields: Any) -> dict:
+        chat_id = int(data.get("chat_id", 1))
+        return {
+            "message_id": next(self._ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            **fields,
+        }
+
+    def _audio(self) -> dict:
+        file_id = f"audio{next(self._ids)}"
+        return {"file_id": file_id, "file_unique_id": file_id, "duration": 0}
+
+    def _result(  # noqa: PLR0911
+        self,
+        method: str,
+        data: dict[str, Any],
+    ) -> Any:  # noqa: ANN401
+        match method:
+            case "getMe":
+                return BOT_USER
+            case "getUserProfilePhotos":
+                return {"total_count": 0, "photos": []}
+            case "getChat":
+                return {"id": int(data["chat_id"]), "type": "channel"}
+            case "getChatMember":
+                return {
+                    "status": "member",
+                    "user": {
+                        "id": int(data["user_id"]),
+                        "is_bot": False,
+                        "first_name": "User",
+                    },
+                }
+            case "sendAudio":
+                return self._message(data, audio=self._audio())
+            case "sendMediaGroup":
+                media = json.loads(data["media"])
+                return [
+                    self._message(data, audio=self._audio()) for _ in media
+                ]
+            case "sendMessage" | "editMessageText":
+                return self._message(data, text=data.get("text", ""))
+            case "editMessageReplyMarkup":
+                return self._message(data)
+            case _:
+                return True
+
+
+async def serve(host: str, port: int) -> None:
+    """Run the fake server until cancelled and print the call counts."""
+    api = FakeTelegramAPI(host, port)
+    await api.start()
+    print(f"Fake Bot API listening on {api.base_url}")  # noqa: T201
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await api.stop()
+        for method, count in api.calls.most_common():
+            print(f"{method:<24} {count}")  # noqa: T201
+
+
+def main() -> None:
+    """Parse the arguments and run the fake server."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""Load test of the dispatcher with thousands of simulated users.
+
+Every user sends /start, searches, turns result pages and downloads
+tracks. The synthetic updates are fed straight into the dispatcher built
+by ``main.py``, so the whole bot runs as in production but without the
+webhook server. The fake Bot API and the fake music site run in a
+separate process, so the memory and CPU figures belong to the bot alone.
+Needs the ``POSTGRES_*`` settings of a local server.
+
+Run with ``python -m benchmarks.load --users 5000 --concurrency 200``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import resource
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.types import InlineKeyboardMarkup
+from aiohttp import ClientError, ClientSession
+
+from .fake_music import FakeMusicSite
+from .fake_telegram import FakeTelegramAPI
+from .suite import configure
+from .updates import UpdateFactory
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+    from aiogram.client.session.middlewares.base import (
+        NextRequestMiddlewareType,
+    )
+    from aiogram.methods import Response, TelegramMethod
+
+FIRST_USER = 2_000_000
+SAMPLE_INTERVAL = 0.01
+STEPS = ("start", "search", "page", "track")
+
+
+class KeyboardRecorder(BaseRequestMiddleware):
+    """Remember the last inline keyboard the bot sent to each chat."""
+
+    def __init__(self) -> None:
+        """Initialize the recorder."""
+        self.keyboards: dict[int, InlineKeyboardMarkup] = {}
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Bot,
+        method: TelegramMethod[Any],
+    ) -> Response[Any]:
+        """Record the keyboard of the request and send it."""
+        markup = getattr(method, "reply_markup", None)
+        chat_id = getattr(method, "chat_id", None)
+        if isinstance(markup, InlineKeyboardMarkup) and chat_id is not None:
+            self.keyboards[int(chat_id)] = markup
+
+        return await make_request(bot, method)
+
+
+class ErrorCounter(logging.Handler):
+    """Count the records logged at error level."""
+
+    def __init__(self) -> None:
+        """Initialize the handler."""
+        super().__init__(logging.ERROR)
+        self.count = 0
+
+    def emit(self, record: logging.LogRecord) -> None:  # noqa: ARG002
+        """Count the record."""
+        self.count += 1
+
+
+def serve_stubs(
+    api_port: int,
+    music_port: int,
+    latency: float,
+    audio_size: int,
+) -> None:
+    """Run the fake Bot API and music site until the process is stopped."""
+
+    async def serve() -> None:
+        api = FakeTelegramAPI(port=api_port)
+        site = FakeMusicSite(
+            port=music_port,
+            latency=latency,
+            audio_size=audio_size,
+        )
+        await api.start()
+        await site.start()
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+async def wait_ready(session: ClientSession, urls: list[str]) -> None:
+    """Wait until every stub answers."""
+    for url in urls:
+        for _ in range(100):
+            try:
+                async with session.get(url) as response:
+                    response.raise_for_status()
+                    break
+            except ClientError:
+                await asyncio.sleep(0.1)
+        else:
+            msg = f"{url} did not start"
+            raise RuntimeError(msg)
+
+
+async def get_stats(session: ClientSession, url: str) -> dict[str, Any]:
+    """Return the call counts of a stub."""
+    async with session.get(url) as response:
+        return await response.json()
+
+
+def peak_memory() -> float:
+    """Return the high-water mark of the resident memory in megabytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in kilobytes on Linux and in bytes on macOS.
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    """Return the latency percentiles in milliseconds."""
+    if len(values) < 2:  # noqa: PLR2004
+        values = values * 2 or [0.0, 0.0]
+
+    cuts = statistics.quantiles(values, n=100)
+    return {
+        "p50_ms": cuts[49] * 1000,
+        "p90_ms": cuts[89] * 1000,
+        "p99_ms": cuts[98] * 1000,
+        "max_ms": max(values) * 1000,
+    }
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:  # noqa: PLR0915
+    """Drive the simulated users and return the report."""
+    from aiogram.types import Update
+
+    import main
+    from database.engine import engine, init_db
+    from database.instrumentation import pool_status
+
+    logging.getLogger().setLevel(logging.WARNING)
+    errors = ErrorCounter()
+    logging.getLogger().addHandler(errors)
+
+    await init_db()
+    bot = await main.create_bot()
+    dp = await main.create_dispatcher(bot)
+    recorder = KeyboardRecorder()
+    bot.session.middleware(recorder)
+    await dp.emit_startup(bot=bot)
+
+    factory = UpdateFactory()
+    timings: dict[str, list[float]] = defaultdict(list)
+    failed_users = 0
+    peak_connections = 0
+    slots = asyncio.Semaphore(args.concurrency)
+    # Keywords repeat between users, so searches also hit the caches.
+    run_id = int(time.time())
+
+    async def feed(step: str, update: dict[str, Any]) -> None:
+        started = time.perf_counter()
+        await dp.feed_update(bot, Update.model_validate(update))
+        timings[step].append(time.perf_counter() - started)
+
+    async def journey(user_id: int) -> None:
+        keyword = f"load {run_id} {user_id % args.keywords}"
+
+        await feed("start", factory.message(user_id, "/start"))
+        await feed("search", factory.message(user_id, keyword))
+        keyboard = recorder.keyboards.get(user_id)
+        if keyboard is None:
+            msg = f"No search results for user {user_id}"
+            raise LookupError(msg)
+
+        callback_data = keyboard.inline_keyboard[0][0].callback_data or ""
+        search_id = callback_data.split(":")[2]
+        for page in range(1, args.pages + 1):
+            await feed(
+                "page",
+                factory.callback(user_id, f"track:page:{search_id}:{page}"),
+            )
+        for index in range(args.downloads):
+            await feed(
+                "track",
+                factory.callback(user_id, f"track:get:{search_id}:{index}"),
+            )
+
+    async def user(user_id: int) -> None:
+        nonlocal failed_users
+        async with slots:
+            try:
+                await journey(user_id)
+            except Exception:
+                failed_users += 1
+                logging.getLogger(__name__).exception("User failed")
+
+    async def sample_pool() -> None:
+        nonlocal peak_connections
+        while True:
+            in_use = pool_status(engine).get("in_use", 0)
+            peak_connections = max(peak_connections, in_use)
+            await asyncio.sleep(SAMPLE_INTERVAL)
+
+    memory_before = peak_memory()
+    sampler = asyncio.create_task(sample_pool())
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(
+            *(user(FIRST_USER + number) for number in range(args.users)),
+        )
+    finally:
+        elapsed = time.perf_counter() - started
+        sampler.cancel()
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
+
+    pool = pool_status(engine)
+    await engine.dispose()
+    updates = sum(len(values) for values in timings.values())
+
+    return {
+        "users": args.users,
+        "failed_users": failed_users,
+        "logged_errors": errors.count,
+        "updates": updates,
+        "seconds": elapsed,
+        "updates_per_second": updates / elapsed,
+        "latency": {
+            "all": percentiles(
+                [value for values in timings.values() for value in values],
+            ),
+            **{
+                step: percentiles(timings[step])
+                for step in STEPS
+                if timings[step]
+            },
+        },
+        "memory": {
+            "peak_before_mb": memory_before,
+            "peak_mb": peak_memory(),
+        },
+        "database": {
+            "pool_size": pool.get("size"),
+            "peak_connections": peak_connections,
+            "checkouts": pool.get("checkouts"),
+            "average_checkout_wait_ms": pool.get("average_checkout_wait", 0)
+            * 1000,
+            "max_checkout_wait_ms": pool.get("max_checkout_wait", 0) * 1000,
+        },
+    }
+
+
+def print_report(report: dict[str, Any]) -> None:
+    """Print the report as aligned tables."""
+    for name in ("users", "failed_users", "logged_errors", "updates"):
+        print(f"{name:<28} {report[name]:>12,}")  # noqa: T201
+    for name in ("seconds", "updates_per_second"):
+        print(f"{name:<28} {report[name]:>12,.2f}")  # noqa: T201
+
+    columns = ("p50_ms", "p90_ms", "p99_ms", "max_ms")
+    header = "".join(f"{column:>12}" for column in columns)
+    print(f"\n{'latency':<10}{header}")  # noqa: T201
+    for step, values in report["latency"].items():
+        print(  # noqa: T201
+            f"{step:<10}"
+            + "".join(f"{value:>12,.1f}" for value in values.values()),
+        )
+
+    for section in ("memory", "database", "telegram", "music"):
+        print()  # noqa: T201
+        for name, value in report[section].items():
+            if isinstance(value, dict):
+                value = json.dumps(value, sort_keys=True)  # noqa: PLW2901
+            elif isinstance(value, float):
+                value = f"{value:,.2f}"  # noqa: PLW2901
+            print(f"{section}.{name:<28} {value}")  # noqa: T201
+
+
+def main() -> None:
+    """Parse the arguments, run the load test and print the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--keywords", type=int, default=500)
+    parser.add_argument("--pages", type=int, default=2)
+    parser.add_argument("--downloads", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--audio-size", type=int, default=4 * 1024 * 1024)
+    parser.add_argument(
+        "--rate-limits",
+        action="store_true",
+        help="Keep the configured Bot API rate limits",
+    )
+    parser.add_argument("--api-port", type=int, default=8081)
+    parser.add_argument("--music-port", type=int, default=8083)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    configure(args.api_port, args.music_port, rate_limits=args.rate_limits)
+
+    stubs = multiprocessing.get_context("spawn").Process(
+        target=serve_stubs,
+        args=(args.api_port, args.music_port, args.latency, args.audio_size),
+        name="stubs",
+        daemon=True,
+    )
+    stubs.start()
+
+    async def run_with_stubs() -> dict[str, Any]:
+        api = f"http://127.0.0.1:{args.api_port}/stats"
+        music = f"http://127.0.0.1:{args.music_port}/stats"
+        async with ClientSession() as session:
+            await wait_ready(session, [api, music])
+            report = await run(args)
+            report["telegram"] = await get_stats(session, api)
+            report["music"] = await get_stats(session, music)
+        return report
+
+    try:
+        report = asyncio.run(run_with_stubs())
+    finally:
+        stubs.terminate()
+        stubs.join()
+
+    print_report(report)
+    if args.output:
+        args.output.write_text(
+            json.dumps(report, indent=2) + "\n",
+            encoding="utf-8",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Benchmark of the playlist extractors against saved pages.
+
+Run with ``python -m benchmarks.parse``.
+"""
+
+from __future__ import annotations
+
+import timeit
+from pathlib import Path
+
+from service.parser import PARSERS
+
+FIXTURES = Path(__file__).parent / "fixtures"
+REPEAT = 5
+NUMBER = 50
+
+
+def run() -> dict[str, dict[str, float]]:
+    """Return the best time per page in milliseconds for each parser."""
+    results: dict[str, dict[str, float]] = {}
+
+    for fixture in sorted(FIXTURES.glob("*.html")):
+        html = fixture.read_text(encoding="utf-8")
+        results[fixture.stem] = {}
+
+        for name, parser_class in PARSERS.items():
+            parser = parser_class()
+            best = min(
+                timeit.repeat(
+                    lambda parser=parser: parser.parse(html),
+                    repeat=REPEAT,
+                    number=NUMBER,
+                ),
+            )
+            results[fixture.stem][name] = best / NUMBER * 1000
+
+    return results
+
+
+def main() -> None:
+    """Print the benchmark results."""
+    for fixture, timings in run().items():
+        baseline = timings["soup"]
+        for name, elapsed in timings.items():
+            print(  # noqa: T201
+                f"{fixture:<10} {name:<6} {elapsed:8.3f} ms "
+                f"x{baseline / elapsed:.1f}",
+            )
+
+
+if __name__ == "__main__":
+    main()
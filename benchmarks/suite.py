@@ -0,0 +1,475 @@
+"""Offline benchmark suite writing its results as JSON.
+
+Covers the playlist parsers and the music service against the saved pages,
+track conversions, track keyboards, loading searches from PostgreSQL and
+whole updates fed through the dispatcher of ``main.py``. Nothing leaves the
+machine: the bot talks to the fake Bot API and the fake music site, which
+run in the same event loop. The ``database`` and ``updates`` groups need
+the ``POSTGRES_*`` settings of a local server, the tables are created if
+missing.
+
+Run with ``python -m benchmarks.suite`` and compare two runs with
+``python -m benchmarks.compare``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from collections import defaultdict
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .fake_music import FIXTURES, FakeMusicSite
+from .fake_telegram import FakeTelegramAPI
+from .updates import UpdateFactory
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from service import Track
+
+Results = dict[str, dict[str, Any]]
+
+RESULTS_DIR = Path(__file__).parent / "results"
+GROUPS = ("parse", "tracks", "keyboards", "database", "updates")
+REPEAT = 5
+BENCHMARK_USER = 1_000_000
+
+
+def result(value: float, unit: str) -> dict[str, Any]:
+    """Return one measurement, ``ms`` per call or a rate per second."""
+    return {"value": round(value, 6), "unit": unit}
+
+
+def rate(func: Callable[[], object], operations: int, number: int) -> float:
+    """Return the best rate of operations per second of the function."""
+    best = min(timeit.repeat(func, repeat=REPEAT, number=number))
+    return operations * number / best
+
+
+async def best_ms(func: Callable[[], Awaitable[object]], number: int) -> float:
+    """Return the best average time of the coroutine in milliseconds."""
+    timings = []
+
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        for _ in range(number):
+            await func()
+        timings.append((time.perf_counter() - started) / number)
+
+    return min(timings) * 1000
+
+
+def percentile(values: list[float], percent: int) -> float:
+    """Return the percentile of the values in milliseconds."""
+    if len(values) < 2:  # noqa: PLR2004
+        return values[0] * 1000 if values else 0.0
+
+    return statistics.quantiles(values, n=100)[percent - 1] * 1000
+
+
+def load_tracks(fixture: str) -> list[Track]:
+    """Return the tracks of the saved page."""
+    from service.parser import get_parser
+
+    html = (FIXTURES / f"{fixture}.html").read_text(encoding="utf-8")
+    return get_parser("fast").parse(html)
+
+
+def bench_parse() -> Results:
+    """Measure the playlist parsers on the saved pages."""
+    from . import parse
+
+    return {
+        f"parse.{fixture}.{name}": result(elapsed, "ms")
+        for fixture, timings in parse.run().items()
+        for name, elapsed in timings.items()
+    }
+
+
+async def bench_music(site: FakeMusicSite) -> Results:
+    """Measure fetching and parsing a page through the music service."""
+    from service import Music
+    from service.data import ServiceConfig
+
+    results: Results = {}
+    config = ServiceConfig(base_url=site.base_url, address=site.host)
+
+    async with Music(config) as music:
+        urls = {
+            "search": music.build_search_query("benchmark"),
+            "top_hits": site.base_url,
+        }
+        for name, url in urls.items():
+            elapsed = await best_ms(
+                lambda url=url: music._parse_tracks(url),  # noqa: SLF001
+                number=20,
+            )
+            results[f"music.parse_tracks.{name}"] = result(elapsed, "ms")
+
+    return results
+
+
+def bench_tracks() -> Results:
+    """Measure creating, serializing and storing tracks."""
+    from bs4 import BeautifulSoup
+
+    from service import Track
+
+    from . import tracks as layouts
+
+    html = (FIXTURES / "search.html").read_text(encoding="utf-8")
+    items = BeautifulSoup(html, "html.parser").select("ul.playlist > li")
+    tracks = [
+        Track.from_element(item, index) for index, item in enumerate(items)
+    ]
+    dicts = [track.to_dict() for track in tracks]
+    rows = [track.to_row() for track in tracks]
+
+    results = {
+        "tracks.from_element": result(
+            rate(
+                lambda: [
+                    Track.from_element(item, index)
+                    for index, item in enumerate(items)
+                ],
+                len(items),
+                number=20,
+            ),
+            "ops/s",
+        ),
+        "tracks.from_dict": result(
+            rate(
+                lambda: [Track.from_dict(data) for data in dicts],
+                len(dicts),
+                number=2000,
+            ),
+            "ops/s",
+        ),
+        "tracks.to_dict": result(
+            rate(
+                lambda: [track.to_dict() for track in tracks],
+                len(tracks),
+                number=2000,
+            ),
+            "ops/s",
+        ),
+        "tracks.from_row": result(
+            rate(
+                lambda: [Track.from_row(row) for row in rows],
+                len(rows),
+                number=2000,
+            ),
+            "ops/s",
+        ),
+        "tracks.to_row": result(
+            rate(
+                lambda: [track.to_row() for track in tracks],
+                len(tracks),
+                number=2000,
+            ),
+            "ops/s",
+        ),
+    }
+    for layout, metrics in layouts.run().items():
+        for metric, value in metrics.items():
+            name, _, unit = metric.rpartition("_")
+            results[f"tracks.{layout}.{name}"] = result(
+                value,
+                "B" if unit == "bytes" else unit,
+            )
+
+    return results
+
+
+def bench_keyboards() -> Results:
+    """Measure building the track keyboard of large searches."""
+    from bot.keyboards.inline import get_keyboard_of_tracks
+
+    pool = load_tracks("top_hits")
+    results: Results = {}
+
+    for size in (100, 10_000, 100_000):
+        tracks = [
+            pool[index % len(pool)]._replace(index=index)
+            for index in range(size)
+        ]
+        # The middle page, the keyboard is built from one page only.
+        page = size // 20
+        number = 500
+        elapsed = min(
+            timeit.repeat(
+                partial(get_keyboard_of_tracks, tracks, 1, page),
+                repeat=REPEAT,
+                number=number,
+            ),
+        )
+        results[f"keyboards.tracks_{size}"] = result(
+            elapsed / number * 1000,
+            "ms",
+        )
+
+    return results
+
+
+async def measure_load(search_id: int) -> tuple[float, float]:
+    """Return the time to load the search without and with the cache."""
+    from bot.utils import load_tracks_from_db, tracks_cache
+    from database.engine import async_session_factory
+
+    async with async_session_factory() as session:
+
+        async def load() -> list[Track]:
+            return await load_tracks_from_db(search_id, session, session)
+
+        async def load_cold() -> list[Track]:
+            tracks_cache.pop(search_id)
+            return await load()
+
+        return await best_ms(load_cold, 100), await best_ms(load, 1000)
+
+
+async def bench_database() -> Results:
+    """Measure loading searches from PostgreSQL with and without cache."""
+    from database.crud import CRUD
+    from database.engine import init_db
+    from database.models import User
+    from database.search_writer import search_writer
+
+    await init_db()
+    await CRUD(User).get_or_create(
+        {"id": BENCHMARK_USER, "language_code": "en"},
+    )
+    results: Results = {}
+
+    for fixture in ("search", "top_hits"):
+        tracks = load_tracks(fixture)
+        search_id = await search_writer.add(
+            BENCHMARK_USER,
+            fixture,
+            tracks,
+        )
+        await search_writer.flush()
+
+        cold, hot = await measure_load(search_id)
+        results[f"database.load_tracks.{len(tracks)}.cold"] = result(
+            cold,
+            "ms",
+        )
+        results[f"database.load_tracks.{len(tracks)}.hot"] = result(hot, "ms")
+
+    return results
+
+
+async def bench_updates(
+    api: FakeTelegramAPI,
+    users: int,
+    concurrency: int,
+) -> Results:
+    """Measure whole updates of users searching and downloading a track.
+
+    Every user sends /start, searches, turns the result page and
+    downloads the first track, concurrently with the other users.
+    """
+    from aiogram.types import Update
+
+    import main
+    from database.engine import engine, init_db
+
+    logging.getLogger().setLevel(logging.WARNING)
+    await init_db()
+    bot = await main.create_bot()
+    dp = await main.create_dispatcher(bot)
+    await dp.emit_startup(bot=bot)
+
+    factory = UpdateFactory()
+    timings: dict[str, list[float]] = defaultdict(list)
+    slots = asyncio.Semaphore(concurrency)
+    # Unique keywords keep tracks of earlier runs out of the file id cache.
+    run = int(time.time())
+
+    async def feed(step: str, update: dict[str, Any]) -> None:
+        started = time.perf_counter()
+        await dp.feed_update(bot, Update.model_validate(update))
+        timings[step].append(time.perf_counter() - started)
+
+    async def journey(user_id: int) -> None:
+        async with slots:
+            await feed("start", factory.message(user_id, "/start"))
+            await feed(
+                "search",
+                factory.message(user_id, f"benchmark {run} {user_id}"),
+            )
+            button = api.markups[user_id]["inline_keyboard"][0][0]
+            search_id = button["callback_data"].split(":")[2]
+            await feed(
+                "page",
+                factory.callback(user_id, f"track:page:{search_id}:1"),
+            )
+            await feed(
+                "track",
+                factory.callback(user_id, f"track:get:{search_id}:0"),
+            )
+
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(journey(BENCHMARK_USER + 1 + number) for number in range(users)),
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
+        await engine.dispose()
+
+    if api.calls["sendAudio"] < users:
+        msg = f"Only {api.calls['sendAudio']} of {users} tracks were sent"
+        raise RuntimeError(msg)
+
+    results: Results = {
+        "updates.throughput": result(
+            sum(len(values) for values in timings.values()) / elapsed,
+            "updates/s",
+        ),
+    }
+    for step, values in timings.items():
+        results[f"updates.{step}.p50"] = result(percentile(values, 50), "ms")
+        results[f"updates.{step}.p95"] = result(percentile(values, 95), "ms")
+
+    return results
+
+
+async def run(args: argparse.Namespace) -> Results:
+    """Run the selected benchmark groups with the fake services."""
+    api = FakeTelegramAPI(port=args.api_port)
+    site = FakeMusicSite(port=args.music_port)
+    groups = set(args.only)
+    await api.start()
+    await site.start()
+    results: Results = {}
+
+    try:
+        if "parse" in groups:
+            results.update(bench_parse())
+            results.update(await bench_music(site))
+        if "tracks" in groups:
+            results.update(bench_tracks())
+        if "keyboards" in groups:
+            results.update(bench_keyboards())
+        if "database" in groups:
+            results.update(await bench_database())
+        if "updates" in groups:
+            results.update(
+                await bench_updates(api, args.users, args.concurrency),
+            )
+    finally:
+        await site.stop()
+        await api.stop()
+
+    return results
+
+
+def configure(
+    api_port: int,
+    music_port: int,
+    *,
+    rate_limits: bool = False,
+) -> None:
+    """Point the bot at the fake services before the configs are read."""
+    os.environ.setdefault("BOT_TOKEN", "123456:benchmark")
+    os.environ.update(
+        {
+            "BOT_API_URL": f"http://127.0.0.1:{api_port}",
+            "MUSIC_URL": f"http://vuxo7.com:{music_port}",
+            "MUSIC_ADDRESS": "127.0.0.1",
+            "METRICS_PORT": "0",
+        },
+    )
+
+    if not rate_limits:
+        # The rate limits would measure the limiter, not the bot.
+        os.environ.update(
+            {
+                "TELEGRAM_GLOBAL_RATE": "1000000",
+                "TELEGRAM_CHAT_RATE": "1000000",
+                "TELEGRAM_CHAT_BURST": "1000000",
+            },
+        )
+
+
+def get_commit() -> str | None:
+    """Return the checked out commit, marked if the tree has changes."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+        changes = subprocess.run(
+            [  # noqa: S607
+                "git",
+                "status",
+                "--porcelain",
+                "--untracked-files=no",
+            ],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return f"{commit}-dirty" if changes else commit
+
+
+def main() -> None:
+    """Parse the arguments, run the benchmarks and save the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=GROUPS)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--api-port", type=int, default=8081)
+    parser.add_argument("--music-port", type=int, default=8083)
+    args = parser.parse_args()
+
+    configure(args.api_port, args.music_port)
+    commit = get_commit()
+    results = asyncio.run(run(args))
+
+    report = {
+        "meta": {
+            "commit": commit,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "users": args.users,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / f"{commit or 'results'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    for name, measurement in results.items():
+        value, unit = measurement["value"], measurement["unit"]
+        print(f"{name:<40} {value:>14,.3f} {unit}")  # noqa: T201
+    print(f"Saved to {output}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
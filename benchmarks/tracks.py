@@ -0,0 +1,143 @@
+"""Benchmark of the memory and time tracks cost in the caches.
+
+Compares the former layout, a dataclass cached as one dictionary per
+track, with the tuple based Track cached as rows. Strings are shared by
+both, so the figures are the overhead of the containers alone.
+
+Run with ``python -m benchmarks.tracks``.
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from service.data import Track
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+COUNT = 10_000
+SEARCH_SIZE = 100
+REPEAT = 5
+NUMBER = 200
+
+
+@dataclass
+class DictTrack:
+    """Track as it was before it became a tuple."""
+
+    index: int
+    name: str
+    title: str
+    performer: str
+    audio_url: str
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert the track to a dictionary."""
+        return {
+            "index": self.index,
+            "name": self.name,
+            "title": self.title,
+            "performer": self.performer,
+            "audio_url": self.audio_url,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> DictTrack:
+        """Create the track from a dictionary."""
+        return cls(
+            index=int(data["index"]),
+            name=data["name"],
+            title=data["title"],
+            performer=data["performer"],
+            audio_url=data["audio_url"],
+        )
+
+
+def make_fields(count: int) -> list[tuple[int, str, str, str, str]]:
+    """Return the fields of distinct tracks."""
+    return [
+        (
+            index,
+            f"Performer {index} - Title {index}",
+            f"Title {index}",
+            f"Performer {index}",
+            f"https://cdn.vuxo7.com/audio/{index}.mp3",
+        )
+        for index in range(count)
+    ]
+
+
+def allocated(factory: Callable[[], object]) -> float:
+    """Return the bytes the factory allocates per track."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        value = factory()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    del value
+    return size / COUNT
+
+
+def decode_ms(factory: Callable[[], object]) -> float:
+    """Return the best time of the factory in milliseconds."""
+    best = min(timeit.repeat(factory, repeat=REPEAT, number=NUMBER))
+    return best / NUMBER * 1000
+
+
+def run() -> dict[str, dict[str, float]]:
+    """Return the memory and decoding time of both layouts."""
+    fields = make_fields(COUNT)
+    old = [DictTrack(*values) for values in fields]
+    new = [Track(*values) for values in fields]
+    old_json = json.dumps([track.to_dict() for track in old[:SEARCH_SIZE]])
+    new_json = json.dumps([track.to_row() for track in new[:SEARCH_SIZE]])
+
+    return {
+        "dataclass": {
+            "instance_bytes": allocated(
+                lambda: [DictTrack(*values) for values in fields],
+            ),
+            "cache_bytes": allocated(lambda: [t.to_dict() for t in old]),
+            "json_bytes": len(old_json.encode()) / SEARCH_SIZE,
+            "decode_ms": decode_ms(
+                lambda: [DictTrack.from_dict(d) for d in json.loads(old_json)],
+            ),
+        },
+        "tuple": {
+            "instance_bytes": allocated(
+                lambda: [Track(*values) for values in fields],
+            ),
+            # The memory cache keeps the tracks themselves.
+            "cache_bytes": allocated(lambda: list(new)),
+            "json_bytes": len(new_json.encode()) / SEARCH_SIZE,
+            "decode_ms": decode_ms(
+                lambda: [Track.from_row(r) for r in json.loads(new_json)],
+            ),
+        },
+    }
+
+
+def main() -> None:
+    """Print the benchmark results."""
+    results = run()
+    baseline = results["dataclass"]
+
+    for metric, old in baseline.items():
+        for layout, values in results.items():
+            print(  # noqa: T201
+                f"{metric:<16} {layout:<10} {values[metric]:10.3f} "
+                f"x{old / values[metric]:.1f}",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Synthetic Telegram updates of simulated users."""
+
+from __future__ import annotations
+
+import itertools
+import time
+from typing import Any
+
+
+class UpdateFactory:
+    """Build updates as the Bot API sends them, with unique ids."""
+
+    def __init__(self, language_code: str = "en") -> None:
+        """Initialize the factory."""
+        self.language_code = language_code
+        self._update_ids = itertools.count(1)
+        self._ids = itertools.count(1)
+
+    def user(self, user_id: int) -> dict[str, Any]:
+        """Return the sender of the updates of the user."""
+        return {
+            "id": user_id,
+            "is_bot": False,
+            "first_name": "User",
+            "language_code": self.language_code,
+        }
+
+    def message(self, user_id: int, text: str) -> dict[str, Any]:
+        """Return a private text message, commands get their entity."""
+        message: dict[str, Any] = {
+            "message_id": next(self._ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": self.user(user_id),
+            "text": text,
+        }
+
+        if text.startswith("/"):
+            command = text.split()[0]
+            message["entities"] = [
+                {"type": "bot_command", "offset": 0, "length": len(command)},
+            ]
+
+        return {"update_id": next(self._update_ids), "message": message}
+
+    def callback(
+        self,
+        user_id: int,
+        data: str,
+        text: str = "",
+    ) -> dict[str, Any]:
+        """Return a button press on a bot message with the given text."""
+        message = {
+            "message_id": next(self._ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": 1, "is_bot": True, "first_name": "Music Bot"},
+            "text": text,
+        }
+
+        return {
+            "update_id": next(self._update_ids),
+            "callback_query": {
+                "id": str(next(self._ids)),
+                "from": self.user(user_id),
+                "chat_instance": str(user_id),
+                "message": message,
+                "data": data,
+            },
+        }
@@ -0,0 +1,110 @@
+"""Load test of the webhook endpoint with synthetic updates.
+
+Start the bot with ``BOT_MODE=webhook``, ``WEBHOOK_BACKGROUND=false`` and
+``BOT_API_URL`` pointing at ``python -m benchmarks.fake_telegram``, then
+run::
+
+    python -m benchmarks.webhook_load --secret <WEBHOOK_SECRET>
+
+The default updates only reach the menu and FAQ handlers, so no music site
+is contacted.
+
+Without ``WEBHOOK_BACKGROUND=false`` the bot answers before handling the
+update, and the figures only measure receiving it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from aiohttp import ClientSession, TCPConnector
+
+from .updates import UpdateFactory
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def make_updates(count: int, users: int) -> list[dict]:
+    """Return synthetic /start messages and menu callbacks."""
+    factory = UpdateFactory()
+
+    return [
+        factory.callback(1000 + number % users, "faq", "/start")
+        if number % 2
+        else factory.message(1000 + number % users, "/start")
+        for number in range(count)
+    ]
+
+
+async def run(
+    url: str,
+    secret: str,
+    updates: list[dict],
+    concurrency: int,
+) -> dict[str, float]:
+    """Post the updates and return throughput and latency figures."""
+    queue: asyncio.Queue[dict] = asyncio.Queue()
+    for update in updates:
+        queue.put_nowait(update)
+
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker(session: ClientSession) -> None:
+        nonlocal errors
+        while not queue.empty():
+            update = queue.get_nowait()
+            started = time.perf_counter()
+            async with session.post(
+                url,
+                json=update,
+                headers={SECRET_HEADER: secret},
+            ) as response:
+                await response.read()
+                if response.status != 200:  # noqa: PLR2004
+                    errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    connector = TCPConnector(limit=concurrency)
+    async with ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(worker(session) for _ in range(concurrency)),
+        )
+        elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "updates": len(updates),
+        "errors": errors,
+        "seconds": elapsed,
+        "updates_per_second": len(updates) / elapsed,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+    }
+
+
+def main() -> None:
+    """Parse the arguments, run the load test and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8443/webhook")
+    parser.add_argument("--secret", required=True)
+    parser.add_argument("--updates", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    updates = make_updates(args.updates, args.users)
+    results = asyncio.run(
+        run(args.url, args.secret, updates, args.concurrency),
+    )
+    for name, value in results.items():
+        print(f"{name:<20} {value:,.2f}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
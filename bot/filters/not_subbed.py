@@ -2,18 +2,25 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import TYPE_CHECKING, ClassVar
 
 from aiogram.enums import ChatMemberStatus
 from aiogram.filters import Filter
 
+from cache import LRUCache, SingleFlight
+from configs import cache_config
 from database.crud import CRUD
+from database.engine import read_session_factory
 from database.models import RequiredSubscriptions, User
+from monitoring.tracing import span
 
 if TYPE_CHECKING:
     from aiogram import Bot, types
 
+    from database.notifier import Notifier
+
 logger = logging.getLogger(__name__)
 
 
@@ -25,6 +32,23 @@ class NotSubbedFilter(Filter):
         ChatMemberStatus.ADMINISTRATOR,
         ChatMemberStatus.CREATOR,
     }
+    # Published by the database whenever required_subscriptions changes.
+    TOPIC = "required_chats"
+
+    _chats: ClassVar[LRUCache[str, list[RequiredSubscriptions]]] = LRUCache(
+        1,
+        cache_config.subs_cache_ttl,
+    )
+    _chats_loading: ClassVar[SingleFlight[list[RequiredSubscriptions]]] = (
+        SingleFlight()
+    )
+    _members: ClassVar[LRUCache[tuple[int, int], bool]] = LRUCache(
+        cache_config.member_cache_size,
+    )
+
+    def __init__(self, *, force_refresh: bool = False) -> None:
+        """Initialize the filter, optionally bypassing the caches."""
+        self.force_refresh = force_refresh
 
     async def __call__(
         self,
@@ -33,17 +57,82 @@ class NotSubbedFilter(Filter):
         bot: Bot,
     ) -> bool:
         """Check if the user is not subscribed to any required channels."""
+        with span("filter", "not_subbed"):
+            chats = await self.get_required_chats(
+                bot,
+                refresh=self.force_refresh,
+            )
+
+            if not chats:
+                return False
+
+            results = await asyncio.gather(
+                *(self._not_subscribe(chat, user, bot) for chat in chats),
+            )
+            return any(results)
+
+    @classmethod
+    async def get_required_chats(
+        cls,
+        bot: Bot,
+        *,
+        refresh: bool = False,
+    ) -> list[RequiredSubscriptions]:
+        """Return the required chats the bot can access."""
+        chats = None if refresh else cls._chats.get("all")
+
+        if chats is None:
+            chats = await cls._chats_loading.do(
+                "all",
+                lambda: cls._load_required_chats(bot),
+            )
+
+        return chats
+
+    @classmethod
+    async def _load_required_chats(
+        cls,
+        bot: Bot,
+    ) -> list[RequiredSubscriptions]:
+        """Load required chats, skipping the ones the bot cannot access."""
         chats: list[RequiredSubscriptions] = await CRUD(
             RequiredSubscriptions,
+            read_session_factory,
         ).get_all()
 
-        if not chats:
+        accessible = await asyncio.gather(
+            *(cls._is_accessible(chat, bot) for chat in chats),
+        )
+        chats = [
+            chat
+            for chat, is_accessible in zip(chats, accessible)
+            if is_accessible
+        ]
+
+        cls._chats.set("all", chats)
+        return chats
+
+    @staticmethod
+    async def _is_accessible(sub: RequiredSubscriptions, bot: Bot) -> bool:
+        """Check if the bot can access the chat."""
+        try:
+            await bot.get_chat(sub.chat_id)
+        except Exception:
+            logger.exception("Failed to get chat %s", sub.chat_id)
             return False
 
-        for chat in chats:
-            if await self._not_subscribe(chat, user, bot):
-                return True
-        return False
+        return True
+
+    @classmethod
+    def sync(cls, notifier: Notifier) -> None:
+        """Forget the cached chats whenever they change in the database."""
+        notifier.subscribe(cls.TOPIC, lambda _: cls.invalidate())
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Forget the cached required chats and memberships."""
+        cls._chats.clear()
+        cls._members.clear()
 
     async def _not_subscribe(
         self,
@@ -52,15 +141,27 @@ class NotSubbedFilter(Filter):
         bot: Bot,
     ) -> bool:
         """Check if the user is subscribed to the channel."""
-        try:
-            chat = await bot.get_chat(sub.chat_id)
-        except Exception:
-            logger.exception("Failed to get chat %s", sub.chat_id)
-            return False
+        key = (user.id, sub.chat_id)
+
+        if not self.force_refresh:
+            is_member = self._members.get(key)
+            if is_member is not None:
+                return not is_member
 
         try:
-            member = await chat.get_member(user.id)
+            member = await bot.get_chat_member(sub.chat_id, user.id)
         except Exception:  # noqa: BLE001
-            return True
+            is_member = False
+        else:
+            is_member = member.status in self.ALLOWED_STATUSES
 
-        return member.status not in self.ALLOWED_STATUSES
+        self._members.set(
+            key,
+            is_member,
+            ttl=(
+                cache_config.member_cache_ttl
+                if is_member
+                else cache_config.not_member_cache_ttl
+            ),
+        )
+        return not is_member
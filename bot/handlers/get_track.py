@@ -3,55 +3,28 @@
 import logging
 
 from aiogram import Bot, F, Router, types
-from aiogram.types import BufferedInputFile
 from aiogram.utils.i18n import gettext
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from bot.utils import get_user_pic, load_tracks_from_db
+from bot.handlers.search import repeat_search
+from bot.profile import BotProfile
+from bot.sender import send_track, send_tracks
+from bot.utils import load_tracks_from_db, shown_at
+from database.models import User
 from service import Music, Track
 
 logger = logging.getLogger(__name__)
 
 
-async def send_track(
+async def get_track_handler(
     callback: types.CallbackQuery,
     bot: Bot,
-    track: Track,
+    user: User,
+    music: Music,
+    bot_profile: BotProfile,
+    session: AsyncSession,
+    read_session: AsyncSession,
 ) -> None:
-    """Send track."""
-    try:
-        if callback.message is None or callback.message.chat is None:
-            await callback.answer(gettext("cannot_access_chat"))
-            return
-
-        await bot.send_chat_action(callback.message.chat.id, "upload_document")
-
-        async with Music() as service:
-            audio_bytes = await service.get_audio_bytes(track)
-
-            audio_file = BufferedInputFile(audio_bytes, filename=track.name)
-
-        me = await bot.get_me()
-
-        if callback.message is None:
-            await callback.answer(gettext("cannot_send_message"))
-            return
-
-        await callback.message.answer_audio(
-            audio_file,
-            title=track.title,
-            performer=track.performer,
-            caption=gettext("promo_caption").format(username=me.username),
-            thumbnail=await get_user_pic(bot, me),
-        )
-    except Exception:
-        if callback.message is not None:
-            await callback.message.answer(gettext("send_track_error"))
-        else:
-            await callback.answer(gettext("send_track_error"))
-        logger.exception("Failed to send track")
-
-
-async def get_track_handler(callback: types.CallbackQuery, bot: Bot) -> None:
     """Get track handler."""
     try:
         if callback.data is None:
@@ -60,10 +33,23 @@ async def get_track_handler(callback: types.CallbackQuery, bot: Bot) -> None:
 
         _, _, search_id_str, index = callback.data.split(":")
         search_id = int(search_id_str)
-        tracks: list[Track] = await load_tracks_from_db(search_id)
+        tracks: list[Track] = await load_tracks_from_db(
+            search_id,
+            session,
+            read_session,
+            shown_at(callback.message),
+        )
+        if not tracks:
+            await repeat_search(callback, user, music)
+            return
+
+        # Do not hold the connection while the track is being uploaded.
+        await session.commit()
+        await read_session.commit()
+
         track: Track = tracks[int(index)]
         await callback.answer(gettext("track_sending"))
-        await send_track(callback, bot, track)
+        await send_track(callback, bot, music, bot_profile, track)
 
     except Exception:
         logger.exception("Failed get track handler")
@@ -72,6 +58,11 @@ async def get_track_handler(callback: types.CallbackQuery, bot: Bot) -> None:
 async def get_all_from_page_handler(
     callback: types.CallbackQuery,
     bot: Bot,
+    user: User,
+    music: Music,
+    bot_profile: BotProfile,
+    session: AsyncSession,
+    read_session: AsyncSession,
 ) -> None:
     """Get all tracks from page handler."""
     try:
@@ -81,11 +72,29 @@ async def get_all_from_page_handler(
 
         _, _, search_id_str, start_indx, end_indx = callback.data.split(":")
         search_id = int(search_id_str)
-        all_tracks: list[Track] = await load_tracks_from_db(search_id)
+        all_tracks: list[Track] = await load_tracks_from_db(
+            search_id,
+            session,
+            read_session,
+            shown_at(callback.message),
+        )
+        if not all_tracks:
+            await repeat_search(callback, user, music)
+            return
+
+        # Do not hold the connection while the tracks are being uploaded.
+        await session.commit()
+        await read_session.commit()
+
         page_tracks = all_tracks[int(start_indx) : int(end_indx)]
         await callback.answer(gettext("track_sending"))
-        for track in page_tracks:
-            await send_track(callback, bot, track)
+        await send_tracks(
+            callback,
+            bot,
+            music,
+            bot_profile,
+            page_tracks,
+        )
 
     except Exception:
         logger.exception("Failed get all from page handler")
@@ -11,8 +11,8 @@ from aiogram.utils.i18n import gettext
 
 from bot.filters import LanguageFilter
 from bot.keyboards import command, inline
-from database.crud import CRUD
 from database.models import User
+from database.user_cache import user_cache
 from locales import support_languages
 
 from .menu import menu_handler
@@ -63,8 +63,7 @@ async def language_set_handler(
         if callback.data:
             language_code = callback.data.split(":")[-1]
 
-            user_crud = CRUD(User)
-            await user_crud.update(user, language_code=language_code)
+            user_cache.update(user, language_code=language_code)
             i18n.get_i18n().ctx_locale.set(language_code)
 
             await bot.set_my_commands(command.get_commands(gettext))
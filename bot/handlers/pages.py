@@ -6,9 +6,13 @@ from typing import TYPE_CHECKING
 from aiogram import F, Router, types
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.utils.i18n import gettext
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from bot.handlers.search import repeat_search
 from bot.keyboards import inline
-from bot.utils import load_tracks_from_db
+from bot.utils import load_tracks_from_db, shown_at
+from database.models import User
+from service import Music
 
 if TYPE_CHECKING:
     from service.data import Track
@@ -16,7 +20,13 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
-async def pages_handler(callback: types.CallbackQuery) -> None:
+async def pages_handler(
+    callback: types.CallbackQuery,
+    user: User,
+    music: Music,
+    session: AsyncSession,
+    read_session: AsyncSession,
+) -> None:
     """Handle the pages navigation."""
     try:
         if not callback.data:
@@ -24,12 +34,25 @@ async def pages_handler(callback: types.CallbackQuery) -> None:
             return
 
         _, _, search_id, page = callback.data.split(":")
-        tracks: list[Track] = await load_tracks_from_db(int(search_id))
+        tracks: list[Track] = await load_tracks_from_db(
+            int(search_id),
+            session,
+            read_session,
+            shown_at(callback.message),
+        )
+
+        # Do not hold the connection while the keyboard is being edited.
+        await session.commit()
+        await read_session.commit()
 
         if not isinstance(callback.message, types.Message):
             await callback.answer(gettext("cannot_edit_message"))
             return
 
+        if not tracks:
+            await repeat_search(callback, user, music, int(page))
+            return
+
         await callback.message.edit_reply_markup(
             reply_markup=inline.get_keyboard_of_tracks(
                 tracks,
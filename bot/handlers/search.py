@@ -3,15 +3,19 @@
 import logging
 
 from aiogram import F, Router, types
+from aiogram.enums import MessageEntityType
 from aiogram.utils.i18n import gettext
 
 from bot.keyboards import inline
-from database.crud import CRUD
-from database.models import SearchHistory, User
+from bot.utils import tracks_cache
+from database.models import User
+from database.search_writer import search_writer
+from locales import support_languages
 from service import Music, Track
 
 # Constants
 MAX_KEYWORD_LENGTH = 100
+TRACK_LISTS = ("top_hits",)
 
 logger = logging.getLogger(__name__)
 
@@ -20,20 +24,19 @@ async def update_search(
     user: User,
     keyword: str,
     tracks: list[Track],
-) -> SearchHistory:
-    """Update the user in the database."""
-    user_crud = CRUD(User)
-    await user_crud.update(user, search_queries=user.search_queries + 1)
-
-    search_history_crud = CRUD(SearchHistory)
-    return await search_history_crud.create(
-        user_id=user.id,
-        keyword=keyword,
-        tracks=[track.__dict__ for track in tracks],
-    )
+) -> int:
+    """Record the search and return its id."""
+    # The writer increments search_queries in the database.
+    search_id = await search_writer.add(user.id, keyword, tracks)
+    tracks_cache.set(search_id, tracks)
+    return search_id
 
 
-async def search_handler(message: types.Message, user: User) -> None:
+async def search_handler(
+    message: types.Message,
+    user: User,
+    music: Music,
+) -> None:
     """Handle the search."""
     try:
         if message.text is None:
@@ -48,30 +51,29 @@ async def search_handler(message: types.Message, user: User) -> None:
         search_message = await message.answer(
             gettext("searching").format(keyword=keyword),
         )
-        async with Music() as service:
-            tracks = await service.search(keyword)
+        tracks = await music.search(keyword)
 
-        search = await update_search(user, keyword, tracks)
+        search_id = await update_search(user, keyword, tracks)
         await search_message.edit_text(
             gettext("search_result").format(keyword=keyword),
-            reply_markup=inline.get_keyboard_of_tracks(tracks, search.id),
+            reply_markup=inline.get_keyboard_of_tracks(tracks, search_id),
         )
     except Exception:
         logger.exception("Failed to send message")
 
 
-async def get_track_list(list_type: str) -> list[Track]:
+async def get_track_list(music: Music, list_type: str) -> list[Track]:
     """Get the track list."""
-    async with Music() as service:
-        map_list_type = {
-            "top_hits": service.get_top_hits,
-        }
-        return await map_list_type[list_type]()
+    map_list_type = {
+        "top_hits": music.get_top_hits,
+    }
+    return await map_list_type[list_type]()
 
 
 async def track_lists_handler(
     callback: types.CallbackQuery,
     user: User,
+    music: Music,
 ) -> None:
     """Handle the track lists."""
     if callback.data is None:
@@ -79,18 +81,64 @@ async def track_lists_handler(
         return
 
     _, _, list_type = callback.data.split(":")
-    tracks = await get_track_list(list_type)
-    search = await update_search(user, list_type, tracks)
+    tracks = await get_track_list(music, list_type)
+    search_id = await update_search(user, list_type, tracks)
 
     if isinstance(callback.message, types.Message):
         await callback.message.answer(
             gettext(list_type),
-            reply_markup=inline.get_keyboard_of_tracks(tracks, search.id),
+            reply_markup=inline.get_keyboard_of_tracks(tracks, search_id),
         )
     else:
         await callback.answer(gettext("cannot_send_message"))
 
 
+def get_search_keyword(message: types.Message) -> str | None:
+    """Return the keyword or list type of the results in the message."""
+    for list_type in TRACK_LISTS:
+        if any(
+            message.html_text == gettext(list_type, locale=language.code)
+            for language in support_languages.languages
+        ):
+            return list_type
+
+    # Search results show the keyword in bold.
+    for entity in message.entities or []:
+        if entity.type == MessageEntityType.BOLD:
+            return entity.extract_from(message.text or "")
+
+    return None
+
+
+async def repeat_search(
+    callback: types.CallbackQuery,
+    user: User,
+    music: Music,
+    page: int = 0,
+) -> None:
+    """Run an expired search again and show the fresh results."""
+    message = callback.message
+    if not isinstance(message, types.Message):
+        await callback.answer(gettext("cannot_edit_message"))
+        return
+
+    keyword = get_search_keyword(message)
+    if keyword is None:
+        await callback.answer(gettext("error_occurred"))
+        return
+
+    if keyword in TRACK_LISTS:
+        tracks = await get_track_list(music, keyword)
+    else:
+        tracks = await music.search(keyword)
+
+    search_id = await update_search(user, keyword, tracks)
+    await message.edit_reply_markup(
+        reply_markup=inline.get_keyboard_of_tracks(tracks, search_id, page),
+    )
+    await callback.answer(gettext("search_refreshed"))
+
+
 def register(router: Router) -> None:
     """Register search handler with the router."""
     router.message.register(search_handler)
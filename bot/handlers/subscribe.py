@@ -9,20 +9,18 @@ from aiogram.utils.i18n import gettext
 
 from bot.filters import NotSubbedFilter
 from bot.keyboards import inline
-from database.crud import CRUD
-from database.models import RequiredSubscriptions, User
+from database.models import User
 
 logger = logging.getLogger(__name__)
 
 
 async def sub_required_handler(
     event: types.Message | types.CallbackQuery,
+    bot: Bot,
 ) -> None:
     """Subscription required handler."""
     try:
-        required_chats: list[RequiredSubscriptions] = await CRUD(
-            RequiredSubscriptions,
-        ).get_all()
+        required_chats = await NotSubbedFilter.get_required_chats(bot)
         text = gettext("not_subscribed")
         keyboard = inline.get_subscribe_keyboard(gettext, required_chats)
 
@@ -46,7 +44,7 @@ async def sub_check_handler(
     bot: Bot,
 ) -> None:
     """Subscription check handler."""
-    sub_check = NotSubbedFilter()
+    sub_check = NotSubbedFilter(force_refresh=True)
     if not isinstance(callback.message, types.Message):
         await callback.answer(gettext("cannot_send_message"))
         return
@@ -1,13 +1,54 @@
 """Middlewares for the bot."""
 
-from aiogram import Dispatcher
+from aiogram import Bot, Dispatcher
 from aiogram.utils.i18n import I18n
 
+from configs import sender_config, tracing_config
+from database.user_cache import user_cache
+from monitoring.profiler import SamplingProfiler
+
 from .auth_middleware import AuthMiddleware
+from .database_middleware import DatabaseMiddleware
 from .i18n_middleware import I18nMiddleware
+from .metrics_middleware import (
+    HandlerMetricsMiddleware,
+    RequestMetricsMiddleware,
+    UpdateMetricsMiddleware,
+)
+from .throttling_middleware import ThrottlingMiddleware
+from .tracing_middleware import (
+    HandlerTracingMiddleware,
+    UpdateTracingMiddleware,
+)
 
 
-def setup(dp: Dispatcher, i18n: I18n) -> None:
+def setup(dp: Dispatcher, i18n: I18n, profiler: SamplingProfiler) -> None:
     """Set up middleware."""
-    dp.update.outer_middleware(AuthMiddleware())
+    dp.update.outer_middleware(
+        UpdateTracingMiddleware(tracing_config.slow_update_threshold),
+    )
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    dp.update.outer_middleware(DatabaseMiddleware())
+    dp.update.outer_middleware(AuthMiddleware(user_cache))
+    dp.startup.register(user_cache.start)
+    dp.shutdown.register(user_cache.stop)
     dp.update.outer_middleware(I18nMiddleware(i18n))
+
+    # Inner middlewares of the root router run for the handlers of all
+    # nested routers, after the handler has been chosen.
+    handler_metrics = HandlerMetricsMiddleware()
+    handler_tracing = HandlerTracingMiddleware(profiler)
+    for name, observer in dp.observers.items():
+        if name not in {"update", "error"}:
+            observer.middleware(handler_metrics)
+            observer.middleware(handler_tracing)
+
+
+def setup_session(bot: Bot, processes: int = 1) -> ThrottlingMiddleware:
+    """Set up middleware for outgoing requests."""
+    # Every process gets an equal share of the bot-wide flood limit.
+    throttling = ThrottlingMiddleware(sender_config.global_rate / processes)
+    bot.session.middleware(throttling)
+    # Registered after throttling so the rate limit waits are not counted.
+    bot.session.middleware(RequestMetricsMiddleware())
+    return throttling
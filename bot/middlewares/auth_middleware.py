@@ -2,14 +2,16 @@
 
 import logging
 from collections.abc import Awaitable
-from datetime import datetime
 from typing import Any, Callable
 
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.crud import CRUD
 from database.models import User
+from database.user_cache import UserCache, user_cache
+from monitoring.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +19,10 @@ logger = logging.getLogger(__name__)
 class AuthMiddleware(BaseMiddleware):
     """Auth middleware for handling user registration in the database."""
 
+    def __init__(self, cache: UserCache = user_cache) -> None:
+        """Initialize the middleware with the user cache."""
+        self.cache = cache
+
     async def __call__(
         self,
         handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
@@ -24,30 +30,56 @@ class AuthMiddleware(BaseMiddleware):
         data: dict[str, Any],
     ) -> Awaitable[Any]:
         """Intercept incoming updates, process them and call the next."""
-        data["user"] = await self.ensure_user_in_db(data["event_from_user"])
+        data["user"] = await self.ensure_user_in_db(
+            data["event_from_user"],
+            data["session"],
+        )
         return await handler(event, data)
 
-    async def ensure_user_in_db(self, user: User) -> User:
+    async def ensure_user_in_db(
+        self,
+        user: User,
+        session: AsyncSession,
+    ) -> User:
         """Ensure that the user is registered in the database."""
-        user_crud = self._get_user_crud()
         user_data = self._prepare_user_data(user)
 
         try:
-            return await self._get_or_create_user(user, user_crud, user_data)
+            db_user = self.cache.get(user.id)
+
+            if db_user is None:
+                with span("auth", "load_user"):
+                    db_user = await self._get_or_create_user(
+                        user,
+                        self._get_user_crud(),
+                        user_data,
+                        session,
+                    )
+                    # Registration does not depend on the handler, and the
+                    # connection is not kept while the handler talks to
+                    # Telegram.
+                    await session.commit()
+                # The cache owns the user from now on, changes go through
+                # its write-back and must not be flushed by this session.
+                session.expunge(db_user)
+                self.cache.put(db_user)
 
         except Exception:
             logger.exception("Failed to process user %s", user.id)
             raise
 
+        self.cache.update(db_user, **user_data)
+        self.cache.touch(db_user)
+        return db_user
+
     def _get_user_crud(self) -> CRUD:
         """Create CRUD instance for User model."""
         return CRUD(User)
 
     @staticmethod
     def _prepare_user_data(user: User) -> dict[str, Any]:
-        """Prepare user data for database operations."""
+        """Prepare user profile data that is kept in sync."""
         return {
-            "id": user.id,
             "username": user.username,
             "first_name": user.first_name,
             "last_name": user.last_name,
@@ -58,18 +90,10 @@ class AuthMiddleware(BaseMiddleware):
         user: User,
         user_crud: CRUD,
         user_data: dict[str, Any],
+        session: AsyncSession,
     ) -> User:
-        """Get existing user or create new one."""
-        db_user: User | None = await user_crud.get(id=user.id)
-
-        if not db_user:
-            user_data["language_code"] = user.language_code
-            db_user = await user_crud.create(**user_data)
-            logger.info("User %s registered in the database.", user.id)
-
-        else:
-            user_data["updated_at"] = datetime.now()  # noqa: DTZ005
-            db_user = await user_crud.update(db_user, **user_data)
-            logger.info("User %s updated in the database.", user.id)
-
-        return db_user
+        """Get existing user or create new one without a duplicate error."""
+        return await user_crud.get_or_create(
+            {"id": user.id, "language_code": user.language_code, **user_data},
+            session,
+        )
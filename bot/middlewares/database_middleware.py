@@ -0,0 +1,68 @@
+"""Database middleware module for the bot."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from aiogram import BaseMiddleware
+
+from database.engine import async_session_factory, read_session_factory
+from monitoring.tracing import span
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+    from typing import Callable
+
+    from aiogram.types import TelegramObject
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+class DatabaseMiddleware(BaseMiddleware):
+    """Run every update in a single database transaction.
+
+    The session is passed to filters and handlers as ``session`` and is
+    committed once the update is handled or rolled back on error. It only
+    checks out a connection on its first query, so updates served from
+    the caches do not touch the pool at all. Read-only queries use
+    ``read_session``, which is the same session unless a replica is set.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[
+            AsyncSession
+        ] = async_session_factory,
+        read_factory: async_sessionmaker[AsyncSession] = read_session_factory,
+    ) -> None:
+        """Initialize the middleware with the session factories."""
+        self.session_factory = session_factory
+        self.read_factory = read_factory
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:  # noqa: ANN401
+        """Open the session, call the next handler and commit."""
+        async with self.session_factory() as session:
+            read_session = (
+                session
+                if self.read_factory.kw["bind"] is session.bind
+                else self.read_factory()
+            )
+            data["session"] = session
+            data["read_session"] = read_session
+
+            try:
+                result = await handler(event, data)
+                with span("db", "commit"):
+                    await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+            finally:
+                if read_session is not session:
+                    await read_session.close()
+
+        return result
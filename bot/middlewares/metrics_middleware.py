@@ -0,0 +1,96 @@
+"""Metrics middlewares for the bot."""
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Any
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.types import Update
+
+from monitoring.metrics import (
+    HANDLER_DURATION,
+    HANDLER_ERRORS,
+    TELEGRAM_DURATION,
+    TELEGRAM_ERRORS,
+    UPDATE_DURATION,
+)
+from monitoring.tracing import span
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+    from typing import Callable
+
+    from aiogram import Bot
+    from aiogram.client.session.middlewares.base import (
+        NextRequestMiddlewareType,
+    )
+    from aiogram.methods import Response, TelegramMethod
+    from aiogram.types import TelegramObject
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Record how long each update takes, the other middlewares included."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:  # noqa: ANN401
+        """Time the processing of the update."""
+        update_type = (
+            event.event_type if isinstance(event, Update) else "unknown"
+        )
+        started = time.perf_counter()
+
+        try:
+            return await handler(event, data)
+        finally:
+            UPDATE_DURATION.observe(time.perf_counter() - started, update_type)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Record the latency and errors of the handler chosen for an event."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:  # noqa: ANN401
+        """Time the handler under its function name."""
+        name = data["handler"].callback.__name__
+        started = time.perf_counter()
+
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(name)
+            raise
+        finally:
+            HANDLER_DURATION.observe(time.perf_counter() - started, name)
+
+
+class RequestMetricsMiddleware(BaseRequestMiddleware):
+    """Record the latency and errors of Bot API requests."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Bot,
+        method: TelegramMethod[Any],
+    ) -> Response[Any]:
+        """Time the request under its API method name."""
+        name = method.__api_method__
+        started = time.perf_counter()
+
+        try:
+            with span("telegram", name):
+                return await make_request(bot, method)
+        except Exception as e:
+            TELEGRAM_ERRORS.inc(name, type(e).__name__)
+            raise
+        finally:
+            TELEGRAM_DURATION.observe(time.perf_counter() - started, name)
@@ -0,0 +1,105 @@
+"""Outgoing request throttling middleware for the bot session."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, ClassVar
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendAudio, SendMediaGroup
+
+from bot.throttling import Priority, PriorityTokenBucket, TokenBucket
+from bot.utils import StreamInputFile
+from cache import LRUCache
+from configs import sender_config
+from monitoring.tracing import span
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+    from aiogram.client.session.middlewares.base import (
+        NextRequestMiddlewareType,
+    )
+    from aiogram.methods import Response, TelegramMethod
+
+logger = logging.getLogger(__name__)
+
+
+class ThrottlingMiddleware(BaseRequestMiddleware):
+    """Keep outgoing requests within Telegram flood limits."""
+
+    BULK_METHODS: ClassVar[tuple[type[TelegramMethod[Any]], ...]] = (
+        SendAudio,
+        SendMediaGroup,
+    )
+
+    def __init__(self, global_rate: float = sender_config.global_rate) -> None:
+        """Initialize the global and per-chat rate limits."""
+        self.global_bucket = PriorityTokenBucket(global_rate)
+        self.chat_buckets: LRUCache[int | str, TokenBucket] = LRUCache(10000)
+        self.retries = 0
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Bot,
+        method: TelegramMethod[Any],
+    ) -> Response[Any]:
+        """Wait for the rate limits and retry on RetryAfter responses."""
+        chat_id = getattr(method, "chat_id", None)
+
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        priority = (
+            Priority.BULK
+            if isinstance(method, self.BULK_METHODS)
+            else Priority.INTERACTIVE
+        )
+        attempts = (
+            sender_config.retry_attempts if self._is_replayable(method) else 0
+        )
+
+        for _ in range(attempts):
+            await self._acquire(chat_id, priority)
+
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self.retries += 1
+                logger.warning(
+                    "Flood limit hit on %s, retrying in %d s",
+                    type(method).__name__,
+                    e.retry_after,
+                )
+                await asyncio.sleep(e.retry_after)
+
+        await self._acquire(chat_id, priority)
+        return await make_request(bot, method)
+
+    async def _acquire(self, chat_id: int | str, priority: Priority) -> None:
+        """Wait for the chat and then the global rate limit."""
+        bucket = self.chat_buckets.get(chat_id)
+
+        if bucket is None:
+            bucket = TokenBucket(
+                sender_config.chat_rate,
+                sender_config.chat_burst,
+            )
+            self.chat_buckets.set(chat_id, bucket)
+
+        with span("throttle", priority.name.lower()):
+            await bucket.acquire()
+            await self.global_bucket.acquire(priority)
+
+    @staticmethod
+    def _is_replayable(method: TelegramMethod[Any]) -> bool:
+        """Check if the request can be sent again after a failure."""
+        values = [getattr(method, name) for name in type(method).model_fields]
+        media = getattr(method, "media", None)
+
+        if isinstance(media, list):
+            values.extend(item.media for item in media)
+
+        return not any(isinstance(value, StreamInputFile) for value in values)
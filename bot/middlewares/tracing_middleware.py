@@ -0,0 +1,81 @@
+"""Tracing middlewares for the bot."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+
+from monitoring.profiler import SamplingProfiler
+from monitoring.tracing import Trace, span
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+    from typing import Callable
+
+    from aiogram.types import TelegramObject
+
+
+class UpdateTracingMiddleware(BaseMiddleware):
+    """Trace every update and log the span tree of the slow ones."""
+
+    def __init__(self, threshold: float) -> None:
+        """Initialize the middleware, a threshold of 0 disables tracing."""
+        self.threshold = threshold
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:  # noqa: ANN401
+        """Run the update inside a root span."""
+        if not self.threshold or not isinstance(event, Update):
+            return await handler(event, data)
+
+        trace = Trace(f"update:{event.event_type}", self.threshold)
+        user = data.get("event_from_user")
+        trace.attributes.update(
+            update_id=event.update_id,
+            type=event.event_type,
+            user_id=user.id if user else None,
+        )
+        data["trace"] = trace
+
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            trace.root.error = type(e).__name__
+            raise
+        finally:
+            trace.finish()
+
+
+class HandlerTracingMiddleware(BaseMiddleware):
+    """Trace the chosen handler and profile it when it is selected."""
+
+    def __init__(self, profiler: SamplingProfiler) -> None:
+        """Initialize the middleware with the profiler."""
+        self.profiler = profiler
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:  # noqa: ANN401
+        """Run the handler inside a span, sampling it if selected."""
+        name = data["handler"].callback.__name__
+        trace: Trace | None = data.get("trace")
+        if trace is not None:
+            trace.attributes["handler"] = name
+
+        if self.profiler.enabled:
+            user = data.get("event_from_user")
+            if self.profiler.selects(name, user.id if user else None):
+                with self.profiler.profile(), span("handler", name):
+                    return await handler(event, data)
+
+        with span("handler", name):
+            return await handler(event, data)
@@ -0,0 +1,145 @@
+"""Bot identity, thumbnail and captions loaded once and kept fresh."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from typing import TYPE_CHECKING
+
+from aiogram.types import BufferedInputFile
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+    from aiogram.types import InputFile, User
+    from aiogram.utils.i18n import I18n
+
+logger = logging.getLogger(__name__)
+
+
+class BotProfile:
+    """Memoized bot identity used when sending tracks.
+
+    Refreshed on the timer: the avatar is changed outside the bot and the
+    captions come from the locales, which change with a deploy. Call
+    invalidate to have them reloaded sooner, when they are next used.
+    """
+
+    THUMBNAIL_MAX_SIZE = 320
+
+    def __init__(self, i18n: I18n, refresh_interval: float) -> None:
+        """Initialize the empty profile."""
+        self._i18n = i18n
+        self._refresh_interval = refresh_interval
+        self._me: User | None = None
+        self._thumbnail: bytes | None = None
+        self._thumbnail_loaded = False
+        self._thumbnail_lock = asyncio.Lock()
+        self._captions: dict[str, str] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def me(self) -> User:
+        """Return the bot user."""
+        if self._me is None:
+            msg = "Bot profile is not loaded"
+            raise RuntimeError(msg)
+
+        return self._me
+
+    def caption(self, locale: str | None = None) -> str:
+        """Return the promo caption in the given or current locale."""
+        if not self._captions and self._me is not None:
+            self._captions = self._format_captions(self._me)
+
+        locale = locale or self._i18n.current_locale
+        return self._captions.get(locale) or self._captions.get(
+            self._i18n.default_locale,
+            "",
+        )
+
+    async def thumbnail(self, bot: Bot) -> InputFile | None:
+        """Return the bot avatar to upload as an audio thumbnail."""
+        if not self._thumbnail_loaded:
+            async with self._thumbnail_lock:
+                if not self._thumbnail_loaded:
+                    await self._reload_thumbnail(bot)
+
+        if self._thumbnail is None:
+            return None
+
+        return BufferedInputFile(self._thumbnail, filename="thumbnail.jpg")
+
+    def invalidate(self) -> None:
+        """Forget the captions and avatar, they are reloaded when used."""
+        self._captions = {}
+        self._thumbnail = None
+        self._thumbnail_loaded = False
+
+    async def refresh(self, bot: Bot) -> None:
+        """Load the bot identity, avatar and captions."""
+        me = await bot.get_me()
+        self._thumbnail = await self._load_thumbnail(bot, me)
+        self._thumbnail_loaded = True
+        self._captions = self._format_captions(me)
+        self._me = me
+        logger.info("Loaded bot profile of @%s.", me.username)
+
+    def _format_captions(self, me: User) -> dict[str, str]:
+        """Return the promo caption of the bot in every locale."""
+        return {
+            locale: self._i18n.gettext("promo_caption", locale=locale).format(
+                username=me.username,
+            )
+            for locale in self._i18n.available_locales
+        }
+
+    async def _reload_thumbnail(self, bot: Bot) -> None:
+        """Load the avatar again, leaving it out until the timer on errors."""
+        try:
+            self._thumbnail = await self._load_thumbnail(bot, self.me)
+        except Exception:
+            logger.exception("Failed to reload bot thumbnail")
+
+        self._thumbnail_loaded = True
+
+    async def _load_thumbnail(self, bot: Bot, me: User) -> bytes | None:
+        """Download the bot avatar in the largest thumbnail size."""
+        photos = await bot.get_user_profile_photos(me.id, limit=1)
+
+        if not photos.total_count:
+            return None
+
+        sizes = [
+            size
+            for size in photos.photos[0]
+            if max(size.width, size.height) <= self.THUMBNAIL_MAX_SIZE
+        ] or photos.photos[0][:1]
+
+        data = await bot.download(sizes[-1].file_id)
+        return data.read() if data is not None else None
+
+    async def start(self, bot: Bot) -> None:
+        """Load the profile and refresh it periodically."""
+        await self.refresh(bot)
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(bot))
+
+    async def stop(self) -> None:
+        """Stop refreshing the profile."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self, bot: Bot) -> None:
+        """Refresh the profile every refresh interval."""
+        while True:
+            await asyncio.sleep(self._refresh_interval)
+
+            try:
+                await self.refresh(bot)
+            except Exception:
+                logger.exception("Failed to refresh bot profile")
@@ -0,0 +1,291 @@
+"""Track sending with prefetching and album batches."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from tempfile import SpooledTemporaryFile
+from typing import TYPE_CHECKING
+
+import aiohttp
+from aiogram import types
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest
+from aiogram.types import InputMediaAudio
+from aiogram.utils.i18n import gettext
+
+from bot.utils import SpooledInputFile, StreamInputFile
+from configs import sender_config
+from database.track_cache import track_cache
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+    from bot.profile import BotProfile
+    from service import Music, Track
+
+PreparedMedia = tuple[InputMediaAudio, SpooledInputFile | None]
+
+ALBUM_SIZE = 10
+
+logger = logging.getLogger(__name__)
+
+
+async def send_track(
+    callback: types.CallbackQuery,
+    bot: Bot,
+    music: Music,
+    profile: BotProfile,
+    track: Track,
+) -> None:
+    """Send track."""
+    try:
+        if callback.message is None or callback.message.chat is None:
+            await callback.answer(gettext("cannot_access_chat"))
+            return
+
+        message = callback.message
+        caption = profile.caption()
+        file_id = await track_cache.get(track)
+
+        if file_id is not None:
+            try:
+                await message.answer_audio(
+                    file_id,
+                    title=track.title,
+                    performer=track.performer,
+                    caption=caption,
+                )
+            except TelegramBadRequest:
+                logger.warning("Cached file id of %s is invalid", track.name)
+                await track_cache.invalidate(track)
+            else:
+                return
+
+        await bot.send_chat_action(message.chat.id, "upload_document")
+
+        audio_file = StreamInputFile(
+            music.stream_audio(track),
+            filename=track.name,
+        )
+        sent = await message.answer_audio(
+            audio_file,
+            title=track.title,
+            performer=track.performer,
+            caption=caption,
+            thumbnail=await profile.thumbnail(bot),
+        )
+
+        if sent.audio is not None:
+            await track_cache.set(track, sent.audio.file_id)
+
+    except Exception:
+        if callback.message is not None:
+            await callback.message.answer(gettext("send_track_error"))
+        else:
+            await callback.answer(gettext("send_track_error"))
+        logger.exception("Failed to send track")
+
+
+async def _download(
+    music: Music,
+    track: Track,
+    semaphore: asyncio.Semaphore,
+) -> SpooledInputFile:
+    """Download the track into a temporary file spilling to disk."""
+    async with semaphore:
+        file: SpooledTemporaryFile[bytes] = SpooledTemporaryFile(
+            max_size=sender_config.spool_threshold,
+        )
+
+        try:
+            async for chunk in music.stream_audio(track):
+                file.write(chunk)
+        except BaseException:
+            file.close()
+            raise
+
+    return SpooledInputFile(file, filename=track.name)
+
+
+async def _prepare_media(
+    bot: Bot,
+    music: Music,
+    profile: BotProfile,
+    track: Track,
+    file_id: str | None,
+    semaphore: asyncio.Semaphore,
+) -> PreparedMedia:
+    """Build the album item, downloading the track unless it is cached."""
+    if file_id is not None:
+        media = InputMediaAudio(
+            media=file_id,
+            title=track.title,
+            performer=track.performer,
+            caption=profile.caption(),
+        )
+        return media, None
+
+    file = await _download(music, track, semaphore)
+    media = InputMediaAudio(
+        media=file,
+        thumbnail=await profile.thumbnail(bot),
+        title=track.title,
+        performer=track.performer,
+        caption=profile.caption(),
+    )
+    return media, file
+
+
+async def send_tracks(
+    callback: types.CallbackQuery,
+    bot: Bot,
+    music: Music,
+    profile: BotProfile,
+    tracks: list[Track],
+) -> None:
+    """Send tracks as albums, downloading them ahead of the upload."""
+    if not isinstance(callback.message, types.Message):
+        await callback.answer(gettext("cannot_access_chat"))
+        return
+
+    message = callback.message
+    semaphore = asyncio.Semaphore(sender_config.prefetch_concurrency)
+    # One query for the page instead of a connection per track.
+    file_ids = await track_cache.get_many(tracks)
+
+    prepared = [
+        asyncio.create_task(
+            _prepare_media(bot, music, profile, track, file_id, semaphore),
+        )
+        for track, file_id in zip(tracks, file_ids)
+    ]
+
+    try:
+        await bot.send_chat_action(message.chat.id, "upload_document")
+
+        for start in range(0, len(tracks), ALBUM_SIZE):
+            await _send_album(
+                callback,
+                bot,
+                music,
+                profile,
+                tracks[start : start + ALBUM_SIZE],
+                prepared[start : start + ALBUM_SIZE],
+            )
+
+    finally:
+        for task in prepared:
+            task.cancel()
+
+        for task in prepared:
+            with contextlib.suppress(BaseException):
+                _, file = await task
+                if file is not None:
+                    file.close()
+
+
+async def _send_album(
+    callback: types.CallbackQuery,
+    bot: Bot,
+    music: Music,
+    profile: BotProfile,
+    tracks: list[Track],
+    prepared: list[asyncio.Task[PreparedMedia]],
+) -> None:
+    """Send one album, falling back to single tracks if it is rejected."""
+    results = await asyncio.gather(*prepared, return_exceptions=True)
+    items: list[tuple[Track, InputMediaAudio, SpooledInputFile | None]] = []
+
+    for track, result in zip(tracks, results):
+        if isinstance(result, BaseException):
+            logger.error("Failed to download %s: %s", track.name, result)
+            continue
+
+        media, file = result
+        items.append((track, media, file))
+
+    if len(items) < len(tracks) and isinstance(
+        callback.message,
+        types.Message,
+    ):
+        await callback.message.answer(gettext("send_track_error"))
+
+    if not items or not isinstance(callback.message, types.Message):
+        return
+
+    message = callback.message
+
+    try:
+        if len(items) == 1:
+            _, media, _ = items[0]
+            sent = [await _answer_media(message, media)]
+        else:
+            sent = await message.answer_media_group(
+                [media for _, media, _ in items],
+            )
+
+    except (TelegramAPIError, aiohttp.ClientError) as e:
+        logger.warning("Failed to send album, sending one by one: %s", e)
+        # The error reply is best effort, the tracks matter more.
+        with contextlib.suppress(TelegramAPIError, aiohttp.ClientError):
+            await message.answer(gettext("send_track_error"))
+
+        await _send_one_by_one(callback, bot, music, profile, items)
+        return
+
+    await track_cache.set_many(
+        [
+            (track, audio_message.audio.file_id)
+            for (track, _, file), audio_message in zip(items, sent)
+            if file is not None and audio_message.audio is not None
+        ],
+    )
+
+
+async def _send_one_by_one(
+    callback: types.CallbackQuery,
+    bot: Bot,
+    music: Music,
+    profile: BotProfile,
+    items: list[tuple[Track, InputMediaAudio, SpooledInputFile | None]],
+) -> None:
+    """Send the album items separately, reusing the downloaded files."""
+    if not isinstance(callback.message, types.Message):
+        return
+
+    message = callback.message
+    uploads: list[tuple[Track, str]] = []
+
+    for track, media, file in items:
+        if file is None:
+            # The cached file id may be what Telegram rejected, send_track
+            # replaces an invalid one.
+            await send_track(callback, bot, music, profile, track)
+            continue
+
+        try:
+            sent = await _answer_media(message, media)
+        except Exception:
+            await message.answer(gettext("send_track_error"))
+            logger.exception("Failed to send %s", track.name)
+            continue
+
+        if sent.audio is not None:
+            uploads.append((track, sent.audio.file_id))
+
+    await track_cache.set_many(uploads)
+
+
+async def _answer_media(
+    message: types.Message,
+    media: InputMediaAudio,
+) -> types.Message:
+    """Send the album item as a single audio message."""
+    return await message.answer_audio(
+        media.media,
+        thumbnail=media.thumbnail,
+        title=media.title,
+        performer=media.performer,
+        caption=media.caption,
+    )
@@ -0,0 +1,138 @@
+"""Rate limiting primitives for outgoing Telegram requests."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass
+from enum import IntEnum
+
+
+class TokenBucket:
+    """Token bucket allowing bursts up to capacity at a sustained rate."""
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        """Initialize a full bucket refilled with rate tokens per second."""
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        """Add the tokens accumulated since the last refill."""
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, tokens: float = 1) -> float:
+        """Wait until the tokens are available and return the time waited."""
+        started = time.monotonic()
+
+        async with self._lock:
+            self._refill()
+
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+
+            self._tokens -= tokens
+
+        return time.monotonic() - started
+
+
+class Priority(IntEnum):
+    """Scheduling priority of an outgoing request, lower goes first."""
+
+    INTERACTIVE = 0
+    BULK = 1
+
+
+@dataclass
+class WaitStats:
+    """Time requests spent waiting for the rate limit."""
+
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def record(self, waited: float) -> None:
+        """Record the wait of one request."""
+        self.count += 1
+        self.total += waited
+        self.max = max(self.max, waited)
+
+    @property
+    def average(self) -> float:
+        """Return the average wait."""
+        return self.total / self.count if self.count else 0.0
+
+
+class PriorityTokenBucket:
+    """Token bucket handing out tokens to waiters in priority order."""
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        """Initialize a full bucket refilled with rate tokens per second."""
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.wait_stats = {priority: WaitStats() for priority in Priority}
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._waiters: list[tuple[Priority, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+        self._pump: asyncio.Task[None] | None = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of requests waiting for a token."""
+        return len(self._waiters)
+
+    def _refill(self) -> None:
+        """Add the tokens accumulated since the last refill."""
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    async def acquire(
+        self,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> float:
+        """Wait for a token and return the time waited."""
+        started = time.monotonic()
+        self._refill()
+
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            heapq.heappush(
+                self._waiters,
+                (priority, next(self._sequence), waiter),
+            )
+
+            if self._pump is None or self._pump.done():
+                self._pump = asyncio.create_task(self._release_waiters())
+
+            await waiter
+
+        waited = time.monotonic() - started
+        self.wait_stats[priority].record(waited)
+        return waited
+
+    async def _release_waiters(self) -> None:
+        """Hand out tokens to the highest priority waiters as they refill."""
+        while self._waiters:
+            self._refill()
+
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                self._tokens -= 1
+                waiter.set_result(None)
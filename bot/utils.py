@@ -2,43 +2,138 @@
 
 from __future__ import annotations
 
+import asyncio
+from datetime import datetime, timezone
 from typing import TYPE_CHECKING
 
-from aiogram.types import InputFile, URLInputFile
+from aiogram.types import InputFile, Message
 
-from database.crud import CRUD
-from database.models import SearchHistory
+from cache import LRUCache
+from configs import cache_config, count_processes, db_config
+from database.search_writer import search_writer
+from database.track_store import track_store
 from service.data import Track
 
 if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, AsyncIterator
+    from tempfile import SpooledTemporaryFile
+
     from aiogram import Bot
-    from aiogram.types import User
+    from aiogram.types import InaccessibleMessage
+    from sqlalchemy.ext.asyncio import AsyncSession
 
+# Allowed difference between the clocks of Telegram and the bot.
+CLOCK_SKEW = 1.0
 
-async def load_tracks_from_db(search_id: int) -> list[Track]:
-    """Get tracks from the database."""
-    search_history_crud = CRUD(SearchHistory)
-    search: SearchHistory | None = await search_history_crud.get(
-        id=int(search_id),
-    )
+tracks_cache: LRUCache[int, list[Track]] = LRUCache(
+    cache_config.tracks_cache_size,
+)
 
-    if not search:
-        return []
 
-    return [Track.from_dict(track) for track in search.tracks]
+class StreamInputFile(InputFile):
+    """Input file that is uploaded straight from an async byte stream."""
+
+    def __init__(
+        self,
+        stream: AsyncIterator[bytes],
+        filename: str | None = None,
+    ) -> None:
+        """Initialize the input file with the source stream."""
+        super().__init__(filename=filename)
+        self._stream = stream
+
+    async def read(
+        self,
+        bot: Bot,  # noqa: ARG002
+    ) -> AsyncGenerator[bytes, None]:
+        """Yield chunks from the source stream."""
+        async for chunk in self._stream:
+            yield chunk
+
+
+class SpooledInputFile(InputFile):
+    """Input file backed by a temporary file that spills to disk."""
+
+    def __init__(
+        self,
+        file: SpooledTemporaryFile[bytes],
+        filename: str | None = None,
+    ) -> None:
+        """Initialize the input file with the downloaded temporary file."""
+        super().__init__(filename=filename)
+        self._file = file
+
+    async def read(
+        self,
+        bot: Bot,  # noqa: ARG002
+    ) -> AsyncGenerator[bytes, None]:
+        """Yield chunks of the file from the beginning."""
+        self._file.seek(0)
+
+        while chunk := self._file.read(self.chunk_size):
+            yield chunk
+
+    def close(self) -> None:
+        """Close and remove the temporary file."""
+        self._file.close()
 
 
-async def get_user_pic(bot: Bot, user: User) -> InputFile | None:
-    """Get user pic."""
-    url = f"https://api.telegram.org/file/bot{bot.token}/"
+def shown_at(message: Message | InaccessibleMessage | None) -> datetime | None:
+    """Return when the message was last sent or edited, None if unknown."""
+    if not isinstance(message, Message):
+        # Inaccessible messages are older than two days.
+        return None
 
-    photos = await user.get_profile_photos(limit=1)
+    if message.edit_date:
+        return datetime.fromtimestamp(message.edit_date, timezone.utc)
 
-    if photos.total_count:
-        best = photos.photos[0][-1]
-        bot_pic = await bot.get_file(best.file_id)
+    return message.date
 
-        if bot_pic.file_path:
-            return URLInputFile(url + bot_pic.file_path)
 
-    return None
+async def load_tracks_from_db(
+    search_id: int,
+    session: AsyncSession,
+    read_session: AsyncSession,
+    shown: datetime | None = None,
+) -> list[Track]:
+    """Get tracks from the hot cache or the database.
+
+    shown is when the keyboard of the search was last sent or edited, a
+    search buffered by another process is written within one flush
+    interval after that.
+    """
+    tracks = tracks_cache.get(search_id)
+    if tracks is not None:
+        return tracks
+
+    pending = search_writer.get_pending(search_id)
+    if pending is not None:
+        tracks = pending["tracks"]
+        tracks_cache.set(search_id, tracks)
+        return tracks
+
+    tracks = await track_store.load_search(read_session, search_id)
+
+    if not tracks and read_session is not session:
+        # A fresh search may not have reached the replica yet.
+        tracks = await track_store.load_search(session, search_id)
+
+    if not tracks and shown is not None and count_processes() > 1:
+        delay = (
+            shown - datetime.now(timezone.utc)
+        ).total_seconds() + db_config.history_flush_interval + CLOCK_SKEW
+
+        if delay > 0:
+            # The search may still be buffered by another process, give
+            # the connections back to the pools while waiting for its
+            # flush. Older searches are expired and not waited for.
+            await session.commit()
+            await read_session.commit()
+            await asyncio.sleep(delay)
+            tracks = await track_store.load_search(session, search_id)
+
+    if not tracks:
+        return []
+
+    tracks_cache.set(search_id, tracks)
+    return tracks
@@ -0,0 +1,13 @@
+"""Cache primitives and backends."""
+
+from .backends import CacheBackend, MemoryCacheBackend
+from .lru import CacheStats, LRUCache
+from .singleflight import SingleFlight
+
+__all__ = [
+    "CacheBackend",
+    "CacheStats",
+    "LRUCache",
+    "MemoryCacheBackend",
+    "SingleFlight",
+]
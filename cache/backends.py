@@ -0,0 +1,60 @@
+"""Pluggable key-value backends for shared caches."""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any
+
+from .lru import CacheStats, LRUCache
+
+
+class CacheBackend(ABC):
+    """Base class for cache backends storing JSON-serializable values."""
+
+    def __init__(self) -> None:
+        """Initialize the backend."""
+        self.stats = CacheStats()
+
+    @abstractmethod
+    async def get(self, key: str) -> Any | None:  # noqa: ANN401
+        """Return the cached value or None if it is missing or expired."""
+
+    @abstractmethod
+    async def set(
+        self,
+        key: str,
+        value: Any,  # noqa: ANN401
+        ttl: float,
+    ) -> None:
+        """Store the value for ttl seconds."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove the key from the cache."""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process cache backend with LRU eviction."""
+
+    def __init__(self, maxsize: int) -> None:
+        """Initialize the in-process backend."""
+        super().__init__()
+        self._cache: LRUCache[str, Any] = LRUCache(maxsize)
+        self.stats = self._cache.stats
+
+    async def get(self, key: str) -> Any | None:  # noqa: ANN401
+        """Return the cached value or None if it is missing or expired."""
+        return self._cache.get(key)
+
+    async def set(
+        self,
+        key: str,
+        value: Any,  # noqa: ANN401
+        ttl: float,
+    ) -> None:
+        """Store the value for ttl seconds."""
+        self._cache.set(key, value, ttl=ttl)
+
+    async def delete(self, key: str) -> None:
+        """Remove the key from the cache."""
+        self._cache.pop(key)
@@ -0,0 +1,84 @@
+"""Bounded LRU cache with optional time-to-live."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    """Hit and miss counters of a cache."""
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Return the share of lookups that were served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LRUCache(Generic[K, V]):
+    """Least recently used cache with a size limit and optional TTL."""
+
+    def __init__(self, maxsize: int, ttl: float | None = None) -> None:
+        """Initialize the cache."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._data: OrderedDict[K, tuple[float | None, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of cached entries."""
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        """Check if the key is cached and not expired."""
+        item = self._data.get(key)
+        return item is not None and not self._is_expired(item[0])
+
+    def get(self, key: K) -> V | None:
+        """Return the cached value and mark it as recently used."""
+        item = self._data.get(key)
+
+        if item is None or self._is_expired(item[0]):
+            if item is not None:
+                del self._data[key]
+            self.stats.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+        return item[1]
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """Store the value, evicting the least recently used entries."""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> V | None:
+        """Remove the key from the cache and return its value."""
+        item = self._data.pop(key, None)
+        return item[1] if item is not None else None
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        self._data.clear()
+
+    @staticmethod
+    def _is_expired(expires_at: float | None) -> bool:
+        """Check if the entry has expired."""
+        return expires_at is not None and expires_at <= time.monotonic()
@@ -0,0 +1,44 @@
+"""Coalescing of concurrent identical calls."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Generic, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Hashable
+
+V = TypeVar("V")
+
+
+class SingleFlight(Generic[V]):
+    """Run at most one call per key, sharing its result with all callers."""
+
+    def __init__(self) -> None:
+        """Initialize the in-flight call registry."""
+        self._calls: dict[Hashable, asyncio.Future[V]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of calls in flight."""
+        return len(self._calls)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[V]]) -> V:
+        """Await the call in flight for the key or start a new one."""
+        call = self._calls.get(key)
+
+        if call is None:
+            call = asyncio.ensure_future(func())
+            self._calls[key] = call
+            call.add_done_callback(lambda done: self._forget(key, done))
+
+        # Shield the shared call so one cancelled caller does not cancel it
+        # for everybody else waiting on the same key.
+        return await asyncio.shield(call)
+
+    def _forget(self, key: Hashable, call: asyncio.Future[V]) -> None:
+        """Remove the finished call and mark its exception as retrieved."""
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+        if not call.cancelled():
+            call.exception()
@@ -15,6 +15,12 @@ class BotConfig:
     """Configuration class for the bot."""
 
     token: str | None = os.getenv("BOT_TOKEN")
+    api_url: str | None = os.getenv("BOT_API_URL")
+    replicas: int = int(os.getenv("BOT_REPLICAS", "1"))
+    fsm_storage: str = os.getenv("FSM_STORAGE", "memory")
+    profile_refresh_interval: int = int(
+        os.getenv("PROFILE_REFRESH_INTERVAL", "3600"),
+    )
 
     def __post_init__(self) -> None:
         """Post-init method for the bot configuration."""
@@ -22,6 +28,99 @@ class BotConfig:
             msg = "Bot token is not set"
             raise ValueError(msg)
 
+        if self.fsm_storage not in {"memory", "postgres"}:
+            msg = f"Unknown FSM storage: {self.fsm_storage}"
+            raise ValueError(msg)
+
+
+@dataclass
+class WebhookConfig:
+    """Configuration class for receiving updates."""
+
+    mode: str = os.getenv("BOT_MODE", "polling")
+    url: str | None = os.getenv("WEBHOOK_URL")
+    path: str = os.getenv("WEBHOOK_PATH", "/webhook")
+    secret: str | None = os.getenv("WEBHOOK_SECRET")
+    host: str = os.getenv("WEBHOOK_HOST", "0.0.0.0")  # noqa: S104
+    port: int = int(os.getenv("WEBHOOK_PORT", "8443"))
+    workers: int = int(os.getenv("WEBHOOK_WORKERS", "1"))
+    # Answer Telegram before the update is handled, off for load tests.
+    background: bool = os.getenv("WEBHOOK_BACKGROUND", "true") == "true"
+
+    def __post_init__(self) -> None:
+        """Post-init method for the webhook configuration."""
+        if self.mode not in {"polling", "webhook"}:
+            msg = f"Unknown bot mode: {self.mode}"
+            raise ValueError(msg)
+
+        if self.mode == "webhook" and (not self.url or not self.secret):
+            msg = "Webhook configuration is incomplete"
+            raise ValueError(msg)
+
+        if self.workers < 1:
+            msg = "Webhook workers must be at least 1"
+            raise ValueError(msg)
+
+
+@dataclass
+class MetricsConfig:
+    """Configuration class for the metrics endpoint."""
+
+    host: str = os.getenv("METRICS_HOST", "127.0.0.1")
+    port: int = int(os.getenv("METRICS_PORT", "9100"))
+
+
+@dataclass
+class TracingConfig:
+    """Configuration class for update tracing and profiling."""
+
+    slow_update_threshold: float = float(
+        os.getenv("SLOW_UPDATE_THRESHOLD", "0"),
+    )
+    profile_interval: float = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+    profile_handlers: tuple[str, ...] = tuple(
+        name for name in os.getenv("PROFILE_HANDLERS", "").split(",") if name
+    )
+    profile_users: tuple[int, ...] = tuple(
+        int(user) for user in os.getenv("PROFILE_USERS", "").split(",") if user
+    )
+    # Bearer token of /debug/profile, the endpoint is off without one.
+    profile_token: str | None = os.getenv("PROFILE_TOKEN") or None
+
+
+@dataclass
+class MusicConfig:
+    """Configuration class for the music site."""
+
+    url: str = os.getenv("MUSIC_URL", "https://vuxo7.com")
+    address: str | None = os.getenv("MUSIC_ADDRESS")
+    parser: str = os.getenv("MUSIC_PARSER", "fast")
+    parse_executor: str = os.getenv("PARSE_EXECUTOR", "thread")
+    parse_workers: int = int(os.getenv("PARSE_WORKERS", "2"))
+    parse_queue_size: int = int(os.getenv("PARSE_QUEUE_SIZE", "32"))
+
+    def __post_init__(self) -> None:
+        """Post-init method for the music site configuration."""
+        if self.parse_executor not in {"thread", "process"}:
+            msg = f"Unknown parse executor: {self.parse_executor}"
+            raise ValueError(msg)
+
+        if self.parse_workers < 1:
+            msg = "Parse workers must be at least 1"
+            raise ValueError(msg)
+
+
+@dataclass
+class SenderConfig:
+    """Configuration class for sending tracks."""
+
+    prefetch_concurrency: int = int(os.getenv("PREFETCH_CONCURRENCY", "4"))
+    spool_threshold: int = int(os.getenv("SPOOL_THRESHOLD", str(1024 * 1024)))
+    global_rate: float = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+    chat_rate: float = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+    chat_burst: float = float(os.getenv("TELEGRAM_CHAT_BURST", "3"))
+    retry_attempts: int = int(os.getenv("TELEGRAM_RETRY_ATTEMPTS", "3"))
+
 
 @dataclass
 class DBConfig:
@@ -32,6 +131,31 @@ class DBConfig:
     user: str | None = os.getenv("POSTGRES_USER")
     password: str | None = os.getenv("POSTGRES_PASSWORD")
     db: str | None = os.getenv("POSTGRES_DB")
+    replica_host: str | None = os.getenv("POSTGRES_REPLICA_HOST")
+    replica_port: str = os.getenv("POSTGRES_REPLICA_PORT", "5432")
+
+    pool_size: int = int(os.getenv("POSTGRES_POOL_SIZE", "10"))
+    max_overflow: int = int(os.getenv("POSTGRES_MAX_OVERFLOW", "10"))
+    pool_timeout: float = float(os.getenv("POSTGRES_POOL_TIMEOUT", "10"))
+    pool_pre_ping: bool = os.getenv("POSTGRES_POOL_PRE_PING", "true") == "true"
+    pool_recycle: int = int(os.getenv("POSTGRES_POOL_RECYCLE", "1800"))
+    statement_cache_size: int = int(
+        os.getenv("POSTGRES_STATEMENT_CACHE_SIZE", "500"),
+    )
+    slow_query_threshold: float = float(
+        os.getenv("SLOW_QUERY_THRESHOLD", "0.5"),
+    )
+
+    history_batch_size: int = int(os.getenv("HISTORY_BATCH_SIZE", "100"))
+    history_flush_interval: float = float(
+        os.getenv("HISTORY_FLUSH_INTERVAL", "2"),
+    )
+    history_id_block_size: int = int(os.getenv("HISTORY_ID_BLOCK_SIZE", "100"))
+    history_max_pending: int = int(os.getenv("HISTORY_MAX_PENDING", "1000"))
+    history_retention_months: int = int(
+        os.getenv("HISTORY_RETENTION_MONTHS", "0"),
+    )
+    history_archive_dir: str = os.getenv("HISTORY_ARCHIVE_DIR", "archive")
 
     def __post_init__(self) -> None:
         """Post-init method for the database configuration."""
@@ -47,6 +171,57 @@ class DBConfig:
             f"{self.user}:{self.password}@{self.host}:{self.port}/{self.db}"
         )
 
+    @property
+    def replica_url(self) -> str | None:
+        """Return the URL of the read replica if one is configured."""
+        if not self.replica_host:
+            return None
+
+        return (
+            "postgresql+asyncpg://"
+            f"{self.user}:{self.password}@"
+            f"{self.replica_host}:{self.replica_port}/{self.db}"
+        )
+
+
+@dataclass
+class CacheConfig:
+    """Configuration class for the caches."""
+
+    track_cache_size: int = int(os.getenv("TRACK_CACHE_SIZE", "10000"))
+    track_id_cache_size: int = int(os.getenv("TRACK_ID_CACHE_SIZE", "100000"))
+    search_cache_backend: str = os.getenv("SEARCH_CACHE_BACKEND", "memory")
+    search_cache_size: int = int(os.getenv("SEARCH_CACHE_SIZE", "5000"))
+    search_cache_ttl: int = int(os.getenv("SEARCH_CACHE_TTL", "300"))
+    top_hits_cache_ttl: int = int(os.getenv("TOP_HITS_CACHE_TTL", "1800"))
+    tracks_cache_size: int = int(os.getenv("TRACKS_CACHE_SIZE", "2000"))
+    subs_cache_ttl: int = int(os.getenv("SUBS_CACHE_TTL", "60"))
+    member_cache_size: int = int(os.getenv("MEMBER_CACHE_SIZE", "100000"))
+    member_cache_ttl: int = int(os.getenv("MEMBER_CACHE_TTL", "300"))
+    not_member_cache_ttl: int = int(os.getenv("NOT_MEMBER_CACHE_TTL", "15"))
+    user_cache_size: int = int(os.getenv("USER_CACHE_SIZE", "10000"))
+    user_cache_ttl: int = int(os.getenv("USER_CACHE_TTL", "600"))
+    user_flush_interval: int = int(os.getenv("USER_FLUSH_INTERVAL", "10"))
+    user_touch_interval: int = int(os.getenv("USER_TOUCH_INTERVAL", "300"))
+
+    def __post_init__(self) -> None:
+        """Post-init method for the cache configuration."""
+        if self.search_cache_backend not in {"memory", "postgres"}:
+            msg = f"Unknown search cache backend: {self.search_cache_backend}"
+            raise ValueError(msg)
+
 
 bot_config = BotConfig()
+webhook_config = WebhookConfig()
+metrics_config = MetricsConfig()
+tracing_config = TracingConfig()
+music_config = MusicConfig()
+sender_config = SenderConfig()
 db_config = DBConfig()
+cache_config = CacheConfig()
+
+
+def count_processes() -> int:
+    """Return the number of bot processes handling updates together."""
+    workers = webhook_config.workers if webhook_config.mode == "webhook" else 1
+    return bot_config.replicas * workers
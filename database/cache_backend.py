@@ -0,0 +1,79 @@
+"""Cache backend shared between bot replicas through the database."""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete
+from sqlalchemy.exc import SQLAlchemyError
+
+from cache import CacheBackend
+
+from .crud import CRUD
+from .models import CacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+class PostgresCacheBackend(CacheBackend):
+    """Cache backend storing entries in the cache_entries table."""
+
+    PURGE_EVERY = 1000
+
+    def __init__(self) -> None:
+        """Initialize the database backend."""
+        super().__init__()
+        self._crud = CRUD(CacheEntry)
+        self._writes = 0
+
+    async def get(self, key: str) -> Any | None:  # noqa: ANN401
+        """Return the cached value or None if it is missing or expired."""
+        try:
+            entry: CacheEntry | None = await self._crud.get(key=key)
+        except SQLAlchemyError:
+            logger.warning("Failed to read cache entry %s", key)
+            entry = None
+
+        if entry is None or entry.expires_at <= datetime.now():  # noqa: DTZ005
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        return entry.value
+
+    async def set(
+        self,
+        key: str,
+        value: Any,  # noqa: ANN401
+        ttl: float,
+    ) -> None:
+        """Store the value for ttl seconds."""
+        expires_at = datetime.now() + timedelta(seconds=ttl)  # noqa: DTZ005
+
+        try:
+            await self._crud.upsert(
+                {"key": key, "value": value, "expires_at": expires_at},
+            )
+
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                await self.purge_expired()
+
+        except SQLAlchemyError:
+            logger.warning("Failed to write cache entry %s", key)
+
+    async def delete(self, key: str) -> None:
+        """Remove the key from the cache."""
+        await self._crud.delete_where(key=key)
+
+    async def purge_expired(self) -> None:
+        """Delete all expired entries."""
+        async with self._crud.get_session() as session:
+            await session.execute(
+                delete(CacheEntry).where(
+                    CacheEntry.expires_at <= datetime.now(),  # noqa: DTZ005
+                ),
+            )
+            await session.commit()
@@ -2,28 +2,71 @@
 
 from __future__ import annotations
 
+import functools
 import logging
+import time
 from contextlib import asynccontextmanager
-from typing import TYPE_CHECKING, Any, Generic, TypeVar
+from typing import TYPE_CHECKING, Any, Callable, Generic, TypeVar, cast
 
-from sqlalchemy import select
+from sqlalchemy import delete, inspect, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import SQLAlchemyError
 
+from monitoring.metrics import DB_DURATION, DB_ERRORS
+from monitoring.tracing import span
+
 from .engine import async_session_factory
 
 if TYPE_CHECKING:
-    from collections.abc import AsyncGenerator
+    from collections.abc import (
+        AsyncGenerator,
+        Awaitable,
+        Iterable,
+        Sequence,
+    )
 
     from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 
 T = TypeVar("T")
+F = TypeVar("F", bound="Callable[..., Awaitable[Any]]")
 
 logger = logging.getLogger(__name__)
 
 
+def timed(method: F) -> F:
+    """Record the duration and failures of a CRUD method."""
+    operation = method.__name__
+
+    @functools.wraps(method)
+    async def wrapper(
+        self: CRUD[Any],
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Any:  # noqa: ANN401
+        model = self.model.__name__
+        started = time.perf_counter()
+
+        try:
+            with span("db", model, operation):
+                return await method(self, *args, **kwargs)
+        except Exception:
+            DB_ERRORS.inc(model, operation)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            DB_DURATION.observe(elapsed, model, operation)
+
+    return cast("F", wrapper)
+
+
 class CRUD(Generic[T]):
-    """Generic class to handle CRUD operations for any model."""
+    """Generic class to handle CRUD operations for any model.
+
+    Every method accepts an optional session. Without one the method runs
+    in its own session and commits; with one it only adds its statements
+    to the caller's transaction.
+    """
 
     def __init__(
         self,
@@ -49,67 +92,269 @@ class CRUD(Generic[T]):
         finally:
             await session.close()
 
-    async def create(self, **kwargs: Any) -> T:  # noqa: ANN401
+    @asynccontextmanager
+    async def use_session(
+        self,
+        session: AsyncSession | None = None,
+    ) -> AsyncGenerator[AsyncSession, None]:
+        """Yield the given session or a new one committed on success."""
+        if session is not None:
+            yield session
+            return
+
+        async with self.get_session() as own_session:
+            yield own_session
+            await own_session.commit()
+
+    @timed
+    async def create(
+        self,
+        session: AsyncSession | None = None,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> T:
         """Create a new record in the database."""
-        async with self.get_session() as session:
-            try:
+        try:
+            async with self.use_session(session) as db:
                 instance = self.model(**kwargs)
-                session.add(instance)
-                await session.commit()
-                await session.refresh(instance)
-            except SQLAlchemyError:
-                await session.rollback()
-                logger.exception(
-                    "Failed to create %s",
-                    self.model.__name__,
+                db.add(instance)
+                await db.flush()
+        except SQLAlchemyError:
+            logger.exception("Failed to create %s", self.model.__name__)
+            raise
+
+        return instance
+
+    @timed
+    async def create_many(
+        self,
+        rows: Sequence[dict[str, Any]],
+        session: AsyncSession | None = None,
+    ) -> None:
+        """Insert several records with one statement."""
+        if not rows:
+            return
+
+        try:
+            async with self.use_session(session) as db:
+                await db.execute(insert(self.model), rows)
+        except SQLAlchemyError:
+            logger.exception("Failed to create many %s", self.model.__name__)
+            raise
+
+    @timed
+    async def upsert(
+        self,
+        rows: dict[str, Any] | Sequence[dict[str, Any]],
+        update_fields: Iterable[str] | None = None,
+        index_elements: Iterable[str] | None = None,
+        session: AsyncSession | None = None,
+    ) -> list[T]:
+        """Insert records or update the given fields of existing ones.
+
+        The conflict target defaults to the primary key and the updated
+        fields default to every inserted column outside of it.
+        """
+        rows = [rows] if isinstance(rows, dict) else list(rows)
+        if not rows:
+            return []
+
+        if index_elements is None:
+            index_elements = self._primary_key_names()
+        index_elements = list(index_elements)
+
+        if update_fields is None:
+            update_fields = [
+                key for key in rows[0] if key not in index_elements
+            ]
+
+        statement = insert(self.model).values(rows)
+        set_ = {field: statement.excluded[field] for field in update_fields}
+        statement = (
+            statement.on_conflict_do_update(
+                index_elements=index_elements,
+                set_=set_,
+            )
+            if set_
+            else statement.on_conflict_do_nothing(
+                index_elements=index_elements,
+            )
+        )
+
+        try:
+            async with self.use_session(session) as db:
+                result = await db.scalars(
+                    statement.returning(self.model).execution_options(
+                        populate_existing=True,
+                    ),
                 )
-                raise
-            return instance
+                return list(result.all())
+        except SQLAlchemyError:
+            logger.exception("Failed to upsert %s", self.model.__name__)
+            raise
+
+    @timed
+    async def get_or_create(
+        self,
+        values: dict[str, Any],
+        session: AsyncSession | None = None,
+    ) -> T:
+        """Return the record with the primary key in values, creating it.
 
-    async def get(self, **kwargs: Any) -> T | None:  # noqa: ANN401
+        Existing records cost one SELECT and are not written to. Missing
+        ones are inserted with ON CONFLICT DO NOTHING, so concurrent calls
+        for the same key do not fail.
+        """
+        keys = {name: values[name] for name in self._primary_key_names()}
+        query = select(self.model).filter_by(**keys)
+
+        try:
+            async with self.use_session(session) as db:
+                instance = (await db.scalars(query)).first()
+                if instance is not None:
+                    return instance
+
+                instance = (
+                    await db.scalars(
+                        insert(self.model)
+                        .values(**values)
+                        .on_conflict_do_nothing(index_elements=list(keys))
+                        .returning(self.model),
+                    )
+                ).first()
+                if instance is None:
+                    # Created by a concurrent transaction in the meantime.
+                    instance = (await db.scalars(query)).one()
+        except SQLAlchemyError:
+            logger.exception("Failed to get or create %s", self.model.__name__)
+            raise
+
+        return instance
+
+    @timed
+    async def get(
+        self,
+        session: AsyncSession | None = None,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> T | None:
         """Retrieve a record by any field."""
-        async with self.get_session() as session:
-            query = await session.execute(
-                select(self.model).filter_by(**kwargs),
-            )
+        async with self.use_session(session) as db:
+            query = await db.execute(select(self.model).filter_by(**kwargs))
             return query.scalar_one_or_none()
 
-    async def get_all(self) -> list[T]:
+    @timed
+    async def get_many(
+        self,
+        ids: Iterable[Any],
+        session: AsyncSession | None = None,
+    ) -> list[T]:
+        """Retrieve the records with the given primary keys."""
+        ids = list(ids)
+        if not ids:
+            return []
+
+        column = inspect(self.model).primary_key[0]
+        async with self.use_session(session) as db:
+            query = await db.execute(
+                select(self.model).where(column.in_(ids)),
+            )
+            return list(query.scalars().all())
+
+    @timed
+    async def get_all(self, session: AsyncSession | None = None) -> list[T]:
         """Get all records."""
-        async with self.get_session() as session:
-            query = await session.execute(select(self.model))
+        async with self.use_session(session) as db:
+            query = await db.execute(select(self.model))
             return list(query.scalars().all())
 
-    async def update(self, instance: T, **kwargs: Any) -> T:  # noqa: ANN401
+    @timed
+    async def update(
+        self,
+        instance: T,
+        session: AsyncSession | None = None,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> T:
         """Update a record's information."""
-        async with self.get_session() as session:
-            try:
+        try:
+            async with self.use_session(session) as db:
                 for key, value in kwargs.items():
                     setattr(instance, key, value)
-                session.add(instance)
-                await session.commit()
-                await session.refresh(instance)
-            except SQLAlchemyError:
-                await session.rollback()
-                logger.exception(
-                    "Failed to update %s",
-                    self.model.__name__,
-                )
-                raise
+                db.add(instance)
+        except SQLAlchemyError:
+            logger.exception("Failed to update %s", self.model.__name__)
+            raise
+
+        return instance
+
+    @timed
+    async def update_where(
+        self,
+        values: dict[str, Any],
+        session: AsyncSession | None = None,
+        **filters: Any,  # noqa: ANN401
+    ) -> int:
+        """Update the matching records without loading them."""
+        statement = (
+            update(self.model)
+            .filter_by(**filters)
+            .values(values)
+            .execution_options(synchronize_session=False)
+        )
 
-            return instance
+        try:
+            async with self.use_session(session) as db:
+                result = await db.execute(statement)
+                return result.rowcount
+        except SQLAlchemyError:
+            logger.exception("Failed to update %s", self.model.__name__)
+            raise
+
+    @timed
+    async def update_many(
+        self,
+        rows: list[dict[str, Any]],
+        session: AsyncSession | None = None,
+    ) -> None:
+        """Update several records by primary key in one transaction."""
+        try:
+            async with self.use_session(session) as db:
+                await db.execute(update(self.model), rows)
+        except SQLAlchemyError:
+            logger.exception("Failed to update many %s", self.model.__name__)
+            raise
 
-    async def delete(self, instance: T) -> bool:
+    @timed
+    async def delete(
+        self,
+        instance: T,
+        session: AsyncSession | None = None,
+    ) -> bool:
         """Delete a record from the database."""
-        async with self.get_session() as session:
-            try:
-                await session.delete(instance)
-                await session.commit()
-            except SQLAlchemyError:
-                await session.rollback()
-                logger.exception(
-                    "Failed to delete %s",
-                    self.model.__name__,
-                )
-                raise
-            return True
+        try:
+            async with self.use_session(session) as db:
+                await db.delete(instance)
+        except SQLAlchemyError:
+            logger.exception("Failed to delete %s", self.model.__name__)
+            raise
+
+        return True
+
+    @timed
+    async def delete_where(
+        self,
+        session: AsyncSession | None = None,
+        **filters: Any,  # noqa: ANN401
+    ) -> int:
+        """Delete the matching records without loading them."""
+        statement = delete(self.model).filter_by(**filters)
+
+        try:
+            async with self.use_session(session) as db:
+                result = await db.execute(statement)
+                return result.rowcount
+        except SQLAlchemyError:
+            logger.exception("Failed to delete %s", self.model.__name__)
+            raise
+
+    def _primary_key_names(self) -> list[str]:
+        """Return the names of the primary key columns."""
+        return [column.name for column in inspect(self.model).primary_key]
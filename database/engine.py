@@ -2,7 +2,9 @@
 
 import logging
 
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
@@ -11,9 +13,41 @@ from sqlalchemy.ext.declarative import declarative_base
 
 from configs import db_config
 
+from .instrumentation import InstrumentedPool, log_slow_queries
+from .migrations import migrate
+from .partitions import ensure_partitions
+
 logger = logging.getLogger(__name__)
 
-engine = create_async_engine(db_config.url, future=True)
+# Serializes schema changes between processes starting at the same time.
+SCHEMA_LOCK_ID = 7_340_001
+
+
+def create_engine(url: str) -> AsyncEngine:
+    """Create an engine with the configured pool and statement cache."""
+    engine = create_async_engine(
+        url,
+        future=True,
+        poolclass=InstrumentedPool,
+        pool_size=db_config.pool_size,
+        max_overflow=db_config.max_overflow,
+        pool_timeout=db_config.pool_timeout,
+        pool_pre_ping=db_config.pool_pre_ping,
+        pool_recycle=db_config.pool_recycle,
+        connect_args={
+            "prepared_statement_cache_size": db_config.statement_cache_size,
+            "statement_cache_size": db_config.statement_cache_size,
+        },
+    )
+    log_slow_queries(engine, db_config.slow_query_threshold)
+    return engine
+
+
+engine = create_engine(db_config.url)
+# Read-only queries go to the replica when one is configured.
+read_engine = (
+    create_engine(db_config.replica_url) if db_config.replica_url else engine
+)
 Base = declarative_base()
 
 async_session_factory = async_sessionmaker(
@@ -22,10 +56,25 @@ async_session_factory = async_sessionmaker(
     expire_on_commit=False,
     autoflush=False,
 )
+read_session_factory = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
 
 
 async def init_db() -> None:
-    """Initialize the database."""
+    """Create missing tables and apply pending migrations."""
+    # Register every table on the metadata, the models import Base from here.
+    from . import models  # noqa: F401
+
     async with engine.begin() as conn:
+        await conn.execute(
+            text("SELECT pg_advisory_xact_lock(:id)"),
+            {"id": SCHEMA_LOCK_ID},
+        )
         await conn.run_sync(Base.metadata.create_all)
         logger.info("Database tables created")
+        await migrate(conn)
+        await ensure_partitions(conn)
@@ -0,0 +1,83 @@
+"""FSM storage shared between bot replicas through the database."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder
+from sqlalchemy.dialects.postgresql import insert
+
+from .crud import CRUD
+from .models import FSMState
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from aiogram.fsm.storage.base import KeyBuilder, StateType, StorageKey
+
+
+class PostgresStorage(BaseStorage):
+    """FSM storage keeping states in the fsm_states table."""
+
+    def __init__(self, key_builder: KeyBuilder | None = None) -> None:
+        """Initialize the database storage."""
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+        self._crud = CRUD(FSMState)
+
+    async def set_state(
+        self,
+        key: StorageKey,
+        state: StateType = None,
+    ) -> None:
+        """Set the state of the key."""
+        value = state.state if isinstance(state, State) else state
+        await self._upsert(key, state=value)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        """Return the state of the key."""
+        record = await self._crud.get(key=self.key_builder.build(key))
+        return record.state if record else None
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        """Replace the data of the key."""
+        await self._upsert(key, data=dict(data))
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        """Return a copy of the data of the key."""
+        record = await self._crud.get(key=self.key_builder.build(key))
+        return dict(record.data) if record else {}
+
+    async def update_data(
+        self,
+        key: StorageKey,
+        data: Mapping[str, Any],
+    ) -> dict[str, Any]:
+        """Merge the data into the stored one in a single statement."""
+        statement = insert(FSMState).values(
+            key=self.key_builder.build(key),
+            data=dict(data),
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[FSMState.key],
+            set_={"data": FSMState.data.op("||")(statement.excluded.data)},
+        ).returning(FSMState.data)
+
+        async with self._crud.get_session() as session:
+            result = await session.execute(statement)
+            await session.commit()
+            return dict(result.scalar_one())
+
+    async def close(self) -> None:
+        """Nothing to close, the engine is shared with the bot."""
+
+    async def _upsert(
+        self,
+        key: StorageKey,
+        **values: Any,  # noqa: ANN401
+    ) -> None:
+        """Insert the row of the key or update the given columns."""
+        await self._crud.upsert(
+            {"key": self.key_builder.build(key), **values},
+            update_fields=values,
+        )
@@ -0,0 +1,110 @@
+"""Connection pool and query instrumentation."""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Connection
+    from sqlalchemy.ext.asyncio import AsyncEngine
+    from sqlalchemy.pool import PoolProxiedConnection
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PoolStats:
+    """Checkout and query counters of a connection pool."""
+
+    checkouts: int = 0
+    checkout_wait: float = 0.0
+    max_checkout_wait: float = 0.0
+    slow_queries: int = 0
+
+    @property
+    def average_checkout_wait(self) -> float:
+        """Return the mean time spent waiting for a connection."""
+        return self.checkout_wait / self.checkouts if self.checkouts else 0.0
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that measures how long checkouts wait."""
+
+    stats: PoolStats
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
+        """Initialize the pool and its counters."""
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self) -> PoolProxiedConnection:
+        """Check out a connection and record the time it took."""
+        started = time.perf_counter()
+        connection = super().connect()
+        wait = time.perf_counter() - started
+
+        self.stats.checkouts += 1
+        self.stats.checkout_wait += wait
+        self.stats.max_checkout_wait = max(self.stats.max_checkout_wait, wait)
+        return connection
+
+
+def pool_status(engine: AsyncEngine) -> dict[str, Any]:
+    """Return the current usage and counters of the engine pool."""
+    pool = engine.pool
+    status: dict[str, Any] = {}
+
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        status.update(
+            size=pool.size(),
+            in_use=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=pool.overflow(),
+        )
+
+    if isinstance(pool, InstrumentedPool):
+        status.update(
+            checkouts=pool.stats.checkouts,
+            average_checkout_wait=pool.stats.average_checkout_wait,
+            max_checkout_wait=pool.stats.max_checkout_wait,
+            slow_queries=pool.stats.slow_queries,
+        )
+
+    return status
+
+
+def log_slow_queries(engine: AsyncEngine, threshold: float) -> None:
+    """Log every statement of the engine that runs longer than threshold."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_execute(conn: Connection, *_: Any) -> None:  # noqa: ANN401
+        # A single value, a statement that raises leaves nothing behind.
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_execute(
+        conn: Connection,
+        cursor: Any,  # noqa: ANN401, ARG001
+        statement: str,
+        *_: Any,  # noqa: ANN401
+    ) -> None:
+        elapsed = time.perf_counter() - conn.info["query_started"]
+        if elapsed < threshold:
+            return
+
+        pool = engine.pool
+        if isinstance(pool, InstrumentedPool):
+            pool.stats.slow_queries += 1
+
+        logger.warning(
+            "Slow query took %.3f s: %s",
+            elapsed,
+            " ".join(statement.split())[:500],
+        )
@@ -0,0 +1,57 @@
+"""Versioned schema migrations applied on startup."""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+from sqlalchemy import text
+
+from . import (
+    m001_normalize_tracks,
+    m002_partition_search_history,
+    m003_notify_required_subscriptions,
+)
+
+if TYPE_CHECKING:
+    from types import ModuleType
+
+    from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = logging.getLogger(__name__)
+
+# Append only: the position of a migration is its version.
+MIGRATIONS: list[ModuleType] = [
+    m001_normalize_tracks,
+    m002_partition_search_history,
+    m003_notify_required_subscriptions,
+]
+
+
+async def migrate(conn: AsyncConnection) -> None:
+    """Apply the migrations that are not recorded yet."""
+    await conn.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version integer PRIMARY KEY, "
+            "name varchar NOT NULL, "
+            "applied_at timestamp NOT NULL DEFAULT now())",
+        ),
+    )
+    result = await conn.execute(text("SELECT version FROM schema_migrations"))
+    applied = set(result.scalars().all())
+
+    for version, migration in enumerate(MIGRATIONS, start=1):
+        if version in applied:
+            continue
+
+        name = migration.__name__.rsplit(".", 1)[-1]
+        await migration.upgrade(conn)
+        await conn.execute(
+            text(
+                "INSERT INTO schema_migrations (version, name) "
+                "VALUES (:version, :name)",
+            ),
+            {"version": version, "name": name},
+        )
+        logger.info("Applied migration %s", name)
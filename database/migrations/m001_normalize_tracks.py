@@ -0,0 +1,74 @@
+"""Move tracks out of search_history into the deduplicated tracks table."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from sqlalchemy import text
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    """Fill tracks and track_ids from the JSONB column, then drop it."""
+    result = await conn.execute(
+        text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'search_history' AND column_name = 'tracks'",
+        ),
+    )
+
+    # Databases created after this migration already have the new layout.
+    if result.scalar() is not None:
+        await conn.execute(
+            text(
+                "INSERT INTO tracks (name, title, performer, audio_url) "
+                "SELECT DISTINCT ON (t->>'audio_url', t->>'performer', "
+                "t->>'title') "
+                "t->>'name', t->>'title', t->>'performer', t->>'audio_url' "
+                "FROM search_history, jsonb_array_elements(tracks) AS t "
+                "ON CONFLICT DO NOTHING",
+            ),
+        )
+        await conn.execute(
+            text(
+                "ALTER TABLE search_history ADD COLUMN IF NOT EXISTS "
+                "track_ids integer[] NOT NULL DEFAULT '{}'",
+            ),
+        )
+        await conn.execute(
+            text(
+                "UPDATE search_history AS s SET track_ids = ARRAY("
+                "SELECT tr.id "
+                "FROM jsonb_array_elements(s.tracks) "
+                "WITH ORDINALITY AS e(t, position) "
+                "JOIN tracks AS tr "
+                "ON tr.audio_url = e.t->>'audio_url' "
+                "AND tr.performer = e.t->>'performer' "
+                "AND tr.title = e.t->>'title' "
+                "ORDER BY e.position)",
+            ),
+        )
+        await conn.execute(
+            text("ALTER TABLE search_history DROP COLUMN tracks"),
+        )
+
+    await conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_search_history_user_id_created_at "
+            "ON search_history (user_id, created_at)",
+        ),
+    )
+    await conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_search_history_created_at "
+            "ON search_history (created_at)",
+        ),
+    )
+    await conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_users_created_at "
+            "ON users (created_at)",
+        ),
+    )
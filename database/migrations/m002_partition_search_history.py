@@ -0,0 +1,66 @@
+"""Turn search_history into a table partitioned by month."""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import TYPE_CHECKING
+
+from sqlalchemy import text
+
+from database.partitions import add_months, create_partitions, month_start
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    """Copy the rows into monthly partitions of a new parent table."""
+    result = await conn.execute(
+        text("SELECT relkind FROM pg_class WHERE relname = 'search_history'"),
+    )
+
+    # Databases created after this migration are partitioned already.
+    if result.scalar() == "p":
+        return
+
+    for statement in (
+        "ALTER TABLE search_history RENAME TO search_history_old",
+        "ALTER TABLE search_history_old "
+        "RENAME CONSTRAINT search_history_pkey TO search_history_old_pkey",
+        "DROP INDEX IF EXISTS ix_search_history_user_id_created_at",
+        "DROP INDEX IF EXISTS ix_search_history_created_at",
+        "ALTER SEQUENCE search_history_id_seq OWNED BY NONE",
+        "UPDATE search_history_old SET created_at = now() "
+        "WHERE created_at IS NULL",
+        "CREATE TABLE search_history ("
+        "id integer NOT NULL DEFAULT nextval('search_history_id_seq'), "
+        "user_id bigint NOT NULL REFERENCES users (id), "
+        "keyword varchar, "
+        "track_ids integer[] NOT NULL DEFAULT '{}', "
+        "created_at timestamp NOT NULL, "
+        "PRIMARY KEY (id, created_at)"
+        ") PARTITION BY RANGE (created_at)",
+        "CREATE INDEX ix_search_history_user_id_created_at "
+        "ON search_history (user_id, created_at)",
+        "CREATE INDEX ix_search_history_created_at "
+        "ON search_history (created_at)",
+    ):
+        await conn.execute(text(statement))
+
+    result = await conn.execute(
+        text("SELECT min(created_at) FROM search_history_old"),
+    )
+    today = month_start(date.today())  # noqa: DTZ011
+    oldest = result.scalar()
+    first = month_start(oldest.date()) if oldest else today
+    await create_partitions(conn, first, add_months(today, 1))
+
+    for statement in (
+        "INSERT INTO search_history "
+        "(id, user_id, keyword, track_ids, created_at) "
+        "SELECT id, user_id, keyword, track_ids, created_at "
+        "FROM search_history_old",
+        "DROP TABLE search_history_old",
+        "ALTER SEQUENCE search_history_id_seq OWNED BY search_history.id",
+    ):
+        await conn.execute(text(statement))
@@ -0,0 +1,35 @@
+"""Notify the bot processes when the required subscriptions change."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from sqlalchemy import text
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    """Publish a notifier message on every change of the table."""
+    # Channel and topic of Notifier.CHANNEL and NotSubbedFilter.TOPIC, the
+    # rows are usually edited by hand, so the database sends it.
+    await conn.execute(
+        text(
+            "CREATE OR REPLACE FUNCTION notify_required_subscriptions() "
+            "RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+            "PERFORM pg_notify('bot_invalidate', json_build_object("
+            "'origin', 'database', 'topic', 'required_chats', "
+            "'keys', json_build_array())::text); "
+            "RETURN NULL; END $$",
+        ),
+    )
+    await conn.execute(
+        text(
+            "CREATE TRIGGER required_subscriptions_changed "
+            "AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE "
+            "ON required_subscriptions "
+            "FOR EACH STATEMENT "
+            "EXECUTE FUNCTION notify_required_subscriptions()",
+        ),
+    )
@@ -1,7 +1,19 @@
 """Database models."""
 
+from .cache_entry import CacheEntry
+from .cached_track import CachedTrack
+from .fsm_state import FSMState
 from .required_subs import RequiredSubscriptions
 from .search_history import SearchHistory
+from .stored_track import StoredTrack
 from .user import User
 
-__all__ = ["RequiredSubscriptions", "SearchHistory", "User"]
+__all__ = [
+    "CacheEntry",
+    "CachedTrack",
+    "FSMState",
+    "RequiredSubscriptions",
+    "SearchHistory",
+    "StoredTrack",
+    "User",
+]
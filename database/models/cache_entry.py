@@ -0,0 +1,23 @@
+"""Cache entry database model."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database.engine import Base
+
+
+class CacheEntry(Base):
+    """Shared cache entry model."""
+
+    __tablename__ = "cache_entries"
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[Any] = mapped_column(JSONB)
+
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True)
@@ -0,0 +1,24 @@
+"""Cached track database model."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database.engine import Base
+
+
+class CachedTrack(Base):
+    """Telegram file id of an already uploaded track."""
+
+    __tablename__ = "cached_tracks"
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    file_id: Mapped[str] = mapped_column(String)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.now,
+    )
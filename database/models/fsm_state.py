@@ -0,0 +1,21 @@
+"""FSM state database model."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database.engine import Base
+
+
+class FSMState(Base):
+    """State and data of a conversation shared between bot replicas."""
+
+    __tablename__ = "fsm_states"
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    state: Mapped[str | None] = mapped_column(String, nullable=True)
+    data: Mapped[dict[str, Any]] = mapped_column(JSONB, default=dict)
@@ -8,10 +8,11 @@ from sqlalchemy import (
     BigInteger,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
 )
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Mapped, mapped_column
 
 from database.engine import Base
@@ -21,6 +22,12 @@ class SearchHistory(Base):
     """Search history model."""
 
     __tablename__ = "search_history"
+    __table_args__ = (
+        Index("ix_search_history_user_id_created_at", "user_id", "created_at"),
+        Index("ix_search_history_created_at", "created_at"),
+        # Monthly partitions are managed by database.partitions.
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id: Mapped[int] = mapped_column(
         Integer,
@@ -30,9 +37,13 @@ class SearchHistory(Base):
 
     user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id"))
     keyword: Mapped[str | None] = mapped_column(String, default=None)
-    tracks: Mapped[list[dict[str, str]]] = mapped_column(JSONB, default=[])
+    track_ids: Mapped[list[int]] = mapped_column(
+        ARRAY(Integer),
+        default=list,
+    )
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime,
+        primary_key=True,
         default=datetime.now,
     )
@@ -0,0 +1,32 @@
+"""Stored track database model."""
+
+from __future__ import annotations
+
+from sqlalchemy import Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database.engine import Base
+
+
+class StoredTrack(Base):
+    """Track shared by all searches that returned it."""
+
+    __tablename__ = "tracks"
+    __table_args__ = (
+        UniqueConstraint(
+            "audio_url",
+            "performer",
+            "title",
+            name="uq_tracks_audio_url_performer_title",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(
+        Integer,
+        primary_key=True,
+        autoincrement=True,
+    )
+    name: Mapped[str] = mapped_column(String)
+    title: Mapped[str] = mapped_column(String)
+    performer: Mapped[str] = mapped_column(String)
+    audio_url: Mapped[str] = mapped_column(String)
@@ -31,6 +31,7 @@ class User(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime,
         default=datetime.now,
+        index=True,
     )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime,
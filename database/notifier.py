@@ -0,0 +1,164 @@
+"""Cache invalidation between bot processes through LISTEN/NOTIFY."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+import uuid
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import text
+
+from .engine import engine
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = logging.getLogger(__name__)
+
+
+class Notifier:
+    """Tell the other bot processes which cached keys became stale."""
+
+    CHANNEL = "bot_invalidate"
+    # NOTIFY payloads are limited to 8000 bytes.
+    KEYS_PER_MESSAGE = 500
+    RECONNECT_DELAY = 1
+    MAX_RECONNECT_DELAY = 60
+
+    def __init__(self) -> None:
+        """Initialize the notifier."""
+        self._origin = uuid.uuid4().hex
+        self._handlers: dict[str, Callable[[list[Any]], None]] = {}
+        self._connection: AsyncConnection | None = None
+        self._running = False
+        self._reconnect: asyncio.Task[None] | None = None
+
+    @property
+    def running(self) -> bool:
+        """Return whether the notifier is started."""
+        return self._running
+
+    def subscribe(
+        self,
+        topic: str,
+        handler: Callable[[list[Any]], None],
+    ) -> None:
+        """Call the handler with the keys invalidated by other processes."""
+        self._handlers[topic] = handler
+
+    async def publish(self, topic: str, keys: Iterable[Any]) -> None:
+        """Invalidate the keys of the topic in the other processes."""
+        if not self.running:
+            return
+
+        keys = list(keys)
+        async with engine.connect() as connection:
+            for start in range(0, len(keys), self.KEYS_PER_MESSAGE):
+                payload = json.dumps(
+                    {
+                        "origin": self._origin,
+                        "topic": topic,
+                        "keys": keys[start : start + self.KEYS_PER_MESSAGE],
+                    },
+                )
+                await connection.execute(
+                    text("SELECT pg_notify(:channel, :payload)"),
+                    {"channel": self.CHANNEL, "payload": payload},
+                )
+            await connection.commit()
+
+    async def start(self) -> None:
+        """Start listening on a dedicated connection from the pool."""
+        if self.running:
+            return
+
+        await self._listen()
+        self._running = True
+        logger.info("Listening for cache invalidations")
+
+    async def stop(self) -> None:
+        """Stop listening and return the connection to the pool."""
+        self._running = False
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._reconnect
+            self._reconnect = None
+
+        if self._connection is None:
+            return
+
+        raw = await self._connection.get_raw_connection()
+        raw.driver_connection.remove_termination_listener(self._terminated)
+        await raw.driver_connection.remove_listener(
+            self.CHANNEL,
+            self._receive,
+        )
+        await self._connection.close()
+        self._connection = None
+
+    async def _listen(self) -> None:
+        """Take a connection and listen on it until it is lost."""
+        connection = await engine.connect()
+        try:
+            raw = await connection.get_raw_connection()
+            driver = raw.driver_connection
+            await driver.add_listener(self.CHANNEL, self._receive)
+            driver.add_termination_listener(self._terminated)
+        except BaseException:
+            await connection.close()
+            raise
+
+        self._connection = connection
+
+    def _terminated(self, _: object) -> None:
+        """Reconnect once the listening connection is closed."""
+        if not self._running or self._reconnect is not None:
+            return
+
+        logger.warning("Lost the invalidation connection, reconnecting")
+        lost, self._connection = self._connection, None
+        self._reconnect = asyncio.create_task(self._run_reconnect(lost))
+
+    async def _run_reconnect(self, lost: AsyncConnection | None) -> None:
+        """Listen on a new connection, backing off while that fails."""
+        if lost is not None:
+            with contextlib.suppress(Exception):
+                await lost.invalidate()
+                await lost.close()
+
+        delay = self.RECONNECT_DELAY
+        try:
+            while True:
+                try:
+                    await self._listen()
+                except Exception:
+                    logger.warning(
+                        "Failed to listen for invalidations, retry in %s s",
+                        delay,
+                    )
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+                else:
+                    logger.info("Listening for cache invalidations again")
+                    return
+        finally:
+            self._reconnect = None
+
+    def _receive(self, *args: Any) -> None:  # noqa: ANN401
+        """Dispatch a notification to the handler of its topic."""
+        message = json.loads(args[-1])
+        if message["origin"] == self._origin:
+            return
+
+        handler = self._handlers.get(message["topic"])
+        if handler is not None:
+            handler(message["keys"])
+
+
+notifier = Notifier()
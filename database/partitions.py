@@ -0,0 +1,102 @@
+"""Monthly partitions of the search_history table."""
+
+from __future__ import annotations
+
+import re
+from datetime import date
+from typing import TYPE_CHECKING
+
+from sqlalchemy import text
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from sqlalchemy.ext.asyncio import AsyncConnection
+
+PARENT = "search_history"
+# Partitions created in advance so inserts never miss one.
+MONTHS_AHEAD = 2
+
+_NAME = re.compile(rf"^{PARENT}_(\d{{4}})_(\d{{2}})$")
+
+
+def month_start(day: date) -> date:
+    """Return the first day of the month of the day."""
+    return day.replace(day=1)
+
+
+def add_months(month: date, count: int) -> date:
+    """Return the first day of the month count months later."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Return the name of the partition holding the month."""
+    return f"{PARENT}_{month:%Y_%m}"
+
+
+async def create_partitions(
+    conn: AsyncConnection,
+    first: date,
+    last: date,
+) -> None:
+    """Create the missing partitions from the first to the last month."""
+    month = month_start(first)
+
+    while month <= last:
+        following = add_months(month, 1)
+        await conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(month)} "
+                f"PARTITION OF {PARENT} "
+                f"FOR VALUES FROM ('{month}') TO ('{following}')",
+            ),
+        )
+        month = following
+
+
+async def ensure_partitions(conn: AsyncConnection) -> None:
+    """Create the partitions of this month and the next ones."""
+    today = month_start(date.today())  # noqa: DTZ011
+    await create_partitions(conn, today, add_months(today, MONTHS_AHEAD))
+
+
+def _months(names: Iterable[str]) -> dict[str, date]:
+    """Return the months held by the tables named like partitions."""
+    partitions = {}
+    for name in names:
+        match = _NAME.match(name)
+        if match:
+            year, month = map(int, match.groups())
+            partitions[name] = date(year, month, 1)
+
+    return partitions
+
+
+async def list_partitions(conn: AsyncConnection) -> dict[str, date]:
+    """Return the attached partitions and the months they hold."""
+    result = await conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid "
+            "JOIN pg_class AS parent ON parent.oid = pg_inherits.inhparent "
+            "WHERE parent.relname = :parent",
+        ),
+        {"parent": PARENT},
+    )
+    return _months(result.scalars())
+
+
+async def list_detached(conn: AsyncConnection) -> dict[str, date]:
+    """Return the detached partitions and the months they hold."""
+    result = await conn.execute(
+        text(
+            "SELECT relname FROM pg_class "
+            "WHERE relkind = 'r' AND NOT relispartition "
+            "AND relnamespace = current_schema()::regnamespace "
+            "AND relname LIKE :pattern",
+        ),
+        {"pattern": f"{PARENT}_%"},
+    )
+    return _months(result.scalars())
@@ -0,0 +1,169 @@
+"""Retention of the search history partitions."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import gzip
+import logging
+from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from sqlalchemy import text
+
+from configs import db_config
+
+from .engine import engine
+from .partitions import (
+    PARENT,
+    add_months,
+    ensure_partitions,
+    list_detached,
+    list_partitions,
+    month_start,
+)
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryRetention:
+    """Create upcoming partitions and archive the expired ones."""
+
+    # Only one process maintains the partitions at a time.
+    LOCK_ID = 7_340_002
+    LOCK_TIMEOUT = "5s"
+
+    def __init__(
+        self,
+        months: int = db_config.history_retention_months,
+        archive_dir: str = db_config.history_archive_dir,
+        interval: float = 6 * 60 * 60,
+    ) -> None:
+        """Initialize the retention job."""
+        self.months = months
+        self.archive_dir = Path(archive_dir) if archive_dir else None
+        self.interval = interval
+        self._task: asyncio.Task[None] | None = None
+
+    async def run_once(self) -> list[str]:
+        """Maintain the partitions and return the names of dropped ones."""
+        async with engine.connect() as conn:
+            # Held by the connection, every step commits on its own.
+            locked = await conn.scalar(
+                text("SELECT pg_try_advisory_lock(:id)"),
+                {"id": self.LOCK_ID},
+            )
+            await conn.commit()
+            if not locked:
+                return []
+
+            try:
+                return await self._maintain(conn)
+            finally:
+                await conn.rollback()
+                await conn.execute(
+                    text("SELECT pg_advisory_unlock(:id)"),
+                    {"id": self.LOCK_ID},
+                )
+                await conn.commit()
+
+    async def _maintain(self, conn: AsyncConnection) -> list[str]:
+        """Detach, archive and drop the expired partitions."""
+        await ensure_partitions(conn)
+        await conn.commit()
+
+        if self.months <= 0:
+            return []
+
+        today = month_start(date.today())  # noqa: DTZ011
+        cutoff = add_months(today, -self.months)
+        partitions = await list_partitions(conn)
+
+        for name in sorted(partitions):
+            if partitions[name] >= cutoff:
+                continue
+
+            # The parent is locked exclusively until the commit, so the
+            # detach gets a transaction of its own and gives up instead
+            # of queueing every search behind it.
+            await conn.execute(
+                text(f"SET LOCAL lock_timeout = '{self.LOCK_TIMEOUT}'"),
+            )
+            await conn.execute(
+                text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"),
+            )
+            await conn.commit()
+            logger.info("Detached expired partition %s", name)
+
+        # Also finishes the partitions an earlier run failed to archive.
+        detached = await list_detached(conn)
+        await conn.commit()
+        expired = sorted(
+            name for name, month in detached.items() if month < cutoff
+        )
+
+        for name in expired:
+            if self.archive_dir is not None:
+                await self._archive(conn, name)
+                await conn.commit()
+
+            await conn.execute(text(f"DROP TABLE {name}"))
+            await conn.commit()
+            logger.info("Dropped expired partition %s", name)
+
+        return expired
+
+    async def _archive(self, conn: AsyncConnection, name: str) -> None:
+        """Save the partition as a compressed CSV file."""
+        if self.archive_dir is None:
+            return
+
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        path = self.archive_dir / f"{name}.csv.gz"
+        partial = path.with_name(f"{path.name}.part")
+        raw = await conn.get_raw_connection()
+
+        with gzip.open(partial, "wb") as archive:
+
+            async def write(chunk: bytes) -> None:
+                await asyncio.to_thread(archive.write, chunk)
+
+            await raw.driver_connection.copy_from_table(
+                name,
+                output=write,
+                format="csv",
+                header=True,
+            )
+
+        partial.replace(path)
+        logger.info("Archived partition %s to %s", name, path)
+
+    async def start(self) -> None:
+        """Start maintaining the partitions periodically."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic maintenance."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        """Run the maintenance every interval."""
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Failed to maintain search history")
+
+            await asyncio.sleep(self.interval)
+
+
+history_retention = HistoryRetention()
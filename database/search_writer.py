@@ -0,0 +1,247 @@
+"""Write-behind buffer for search history and search counters."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from collections import Counter, deque
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import bindparam, text, update
+from sqlalchemy.exc import InterfaceError, OperationalError, StatementError
+
+from configs import db_config
+
+from .crud import CRUD
+from .models import SearchHistory, User
+from .track_store import track_store
+
+if TYPE_CHECKING:
+    from service.data import Track
+
+logger = logging.getLogger(__name__)
+
+
+class SearchHistoryWriter:
+    """Buffer searches and write them in batches in the background."""
+
+    ID_SEQUENCE = "search_history_id_seq"
+
+    def __init__(
+        self,
+        batch_size: int = db_config.history_batch_size,
+        flush_interval: float = db_config.history_flush_interval,
+        id_block_size: int = db_config.history_id_block_size,
+        max_pending: int = db_config.history_max_pending,
+    ) -> None:
+        """Initialize the writer."""
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._id_block_size = id_block_size
+        self._max_pending = max_pending
+        self._crud = CRUD(SearchHistory)
+        self._pending: dict[int, dict[str, Any]] = {}
+        self._counters: Counter[int] = Counter()
+        self._ids: deque[int] = deque()
+        self._id_lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+        self._flushes: set[asyncio.Task[None]] = set()
+
+    @property
+    def pending(self) -> int:
+        """Return the number of searches waiting to be written."""
+        return len(self._pending)
+
+    async def allocate_id(self) -> int:
+        """Return a search id reserved from the database sequence."""
+        if not self._ids:
+            async with self._id_lock:
+                if not self._ids:
+                    await self._reserve_ids()
+
+        return self._ids.popleft()
+
+    async def _reserve_ids(self) -> None:
+        """Reserve a block of ids with a single round-trip."""
+        async with self._crud.get_session() as session:
+            result = await session.execute(
+                text(
+                    f"SELECT nextval('{self.ID_SEQUENCE}') "
+                    "FROM generate_series(1, :size)",
+                ),
+                {"size": self._id_block_size},
+            )
+            self._ids.extend(result.scalars().all())
+
+    async def add(
+        self,
+        user_id: int,
+        keyword: str,
+        tracks: list[Track],
+    ) -> int:
+        """Buffer the search and return its id."""
+        if len(self._pending) >= self._max_pending:
+            # The buffer is full, the search waits for the database instead
+            # of growing it while writes fail or fall behind.
+            await self.flush()
+
+        search_id = await self.allocate_id()
+        self._pending[search_id] = {
+            "id": search_id,
+            "user_id": user_id,
+            "keyword": keyword,
+            "tracks": tracks,
+            "created_at": datetime.now(),  # noqa: DTZ005
+        }
+        self._counters[user_id] += 1
+
+        if len(self._pending) >= self._batch_size:
+            flush = asyncio.create_task(self._flush_safely())
+            self._flushes.add(flush)
+            flush.add_done_callback(self._flushes.discard)
+
+        return search_id
+
+    def get_pending(self, search_id: int) -> dict[str, Any] | None:
+        """Return the buffered search that is not written yet."""
+        return self._pending.get(search_id)
+
+    async def flush(self) -> None:
+        """Write buffered searches and counters in one transaction."""
+        async with self._flush_lock:
+            rows = list(self._pending.values())
+            counters = dict(self._counters)
+
+            if not rows and not counters:
+                return
+
+            try:
+                await self._write(rows, counters)
+            except StatementError as e:
+                if _is_disconnect(e):
+                    raise
+
+                # One bad row must not keep the whole buffer from the table.
+                logger.warning("Failed to write searches, retrying one by one")
+                await self._write_one_by_one(rows, counters)
+                return
+
+            logger.info("Flushed %d searches.", len(rows))
+
+    async def _write_one_by_one(
+        self,
+        rows: list[dict[str, Any]],
+        counters: dict[int, int],
+    ) -> None:
+        """Write the rows separately, dropping those the database rejects."""
+        await self._write([], counters)
+
+        for row in rows:
+            try:
+                await self._write([row], {})
+            except StatementError as e:
+                if _is_disconnect(e):
+                    raise
+
+                logger.exception("Dropping search %d", row["id"])
+                self._pending.pop(row["id"], None)
+
+    async def _write(
+        self,
+        rows: list[dict[str, Any]],
+        counters: dict[int, int],
+    ) -> None:
+        """Write the rows and counters and remove them from the buffer."""
+        users = User.__table__
+        increment = (
+            update(users)
+            .where(users.c.id == bindparam("b_user_id"))
+            .values(
+                search_queries=users.c.search_queries + bindparam("b_amount"),
+            )
+        )
+
+        async with self._crud.get_session() as session:
+            track_ids = {}
+            if rows:
+                track_ids = await track_store.get_ids(
+                    session,
+                    (track for row in rows for track in row["tracks"]),
+                )
+                await self._crud.create_many(
+                    [
+                        {
+                            "id": row["id"],
+                            "user_id": row["user_id"],
+                            "keyword": row["keyword"],
+                            "track_ids": [
+                                track_ids[track_store.key(track)]
+                                for track in row["tracks"]
+                            ],
+                            "created_at": row["created_at"],
+                        }
+                        for row in rows
+                    ],
+                    session=session,
+                )
+
+            if counters:
+                await session.execute(
+                    increment,
+                    [
+                        {"b_user_id": user_id, "b_amount": amount}
+                        for user_id, amount in counters.items()
+                    ],
+                )
+
+            await session.commit()
+
+        track_store.remember(track_ids)
+        for row in rows:
+            self._pending.pop(row["id"], None)
+        self._counters.subtract(counters)
+        self._counters = +self._counters
+
+    async def start(self) -> None:
+        """Start flushing periodically."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and write everything buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
+
+    async def _run(self) -> None:
+        """Flush every flush interval."""
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            await self._flush_safely()
+
+    async def _flush_safely(self) -> None:
+        """Flush and log failures, keeping the buffer for the next try."""
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Failed to flush search history")
+
+
+def _is_disconnect(error: StatementError) -> bool:
+    """Return whether the error means the database is unreachable."""
+    return isinstance(error, (InterfaceError, OperationalError)) or getattr(
+        error,
+        "connection_invalidated",
+        False,
+    )
+
+
+search_writer = SearchHistoryWriter()
@@ -0,0 +1,135 @@
+"""Cache of Telegram file ids for already uploaded tracks."""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from cache import LRUCache
+from configs import cache_config
+
+from .crud import CRUD
+from .models import CachedTrack
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from service.data import Track
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TrackCacheStats:
+    """Lookup counters of the track cache."""
+
+    memory_hits: int = 0
+    db_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hits(self) -> int:
+        """Return the lookups served from memory or the database."""
+        return self.memory_hits + self.db_hits
+
+    @property
+    def hit_ratio(self) -> float:
+        """Return the share of lookups that avoided an upload."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class TrackCache:
+    """Persistent track file id cache with an in-memory LRU in front."""
+
+    def __init__(self, maxsize: int = cache_config.track_cache_size) -> None:
+        """Initialize the track cache."""
+        self._memory: LRUCache[str, str] = LRUCache(maxsize)
+        self._crud = CRUD(CachedTrack)
+        self.stats = TrackCacheStats()
+
+    async def get(self, track: Track) -> str | None:
+        """Return the Telegram file id of the track if it was uploaded."""
+        key = track.cache_key
+        file_id = self._memory.get(key)
+
+        if file_id is not None:
+            self.stats.memory_hits += 1
+            return file_id
+
+        cached: CachedTrack | None = await self._crud.get(key=key)
+
+        if cached is None:
+            self.stats.misses += 1
+            return None
+
+        self.stats.db_hits += 1
+        self._memory.set(key, cached.file_id)
+        return cached.file_id
+
+    async def get_many(self, tracks: Sequence[Track]) -> list[str | None]:
+        """Return the file ids of the tracks, with one query for misses."""
+        file_ids = {}
+        missing = set()
+
+        for track in tracks:
+            key = track.cache_key
+            file_id = self._memory.get(key)
+            if file_id is None:
+                missing.add(key)
+            else:
+                self.stats.memory_hits += 1
+                file_ids[key] = file_id
+
+        if missing:
+            cached: list[CachedTrack] = await self._crud.get_many(missing)
+            for row in cached:
+                self._memory.set(row.key, row.file_id)
+                file_ids[row.key] = row.file_id
+
+            self.stats.db_hits += len(cached)
+            self.stats.misses += len(missing) - len(cached)
+
+        return [file_ids.get(track.cache_key) for track in tracks]
+
+    async def set(self, track: Track, file_id: str) -> None:
+        """Remember the Telegram file id of the uploaded track."""
+        key = track.cache_key
+        self._memory.set(key, file_id)
+
+        try:
+            await self._crud.upsert({"key": key, "file_id": file_id})
+
+        except SQLAlchemyError:
+            logger.warning("Failed to persist file id for track %s", key)
+
+    async def set_many(self, uploads: Sequence[tuple[Track, str]]) -> None:
+        """Remember the file ids of several uploads with one statement."""
+        rows = {
+            track.cache_key: {"key": track.cache_key, "file_id": file_id}
+            for track, file_id in uploads
+        }
+        if not rows:
+            return
+
+        for key, row in rows.items():
+            self._memory.set(key, row["file_id"])
+
+        try:
+            await self._crud.upsert(list(rows.values()))
+
+        except SQLAlchemyError:
+            logger.warning("Failed to persist %d file ids", len(rows))
+
+    async def invalidate(self, track: Track) -> None:
+        """Forget the file id of the track."""
+        key = track.cache_key
+        self._memory.pop(key)
+
+        await self._crud.delete_where(key=key)
+
+
+track_cache = TrackCache()
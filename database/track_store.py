@@ -0,0 +1,130 @@
+"""Deduplicated storage of the tracks referenced by searches."""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+from sqlalchemy import select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+
+from cache import LRUCache
+from configs import cache_config
+from service.data import Track
+
+from .models import StoredTrack
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+TrackKey = tuple[str, str, str]
+
+
+class TrackStore:
+    """Map tracks to rows of the tracks table and back."""
+
+    LOAD_SEARCH = text(
+        "SELECT t.name, t.title, t.performer, t.audio_url "
+        "FROM search_history AS s "
+        "CROSS JOIN unnest(s.track_ids) WITH ORDINALITY AS u(id, position) "
+        "JOIN tracks AS t ON t.id = u.id "
+        "WHERE s.id = :search_id "
+        "ORDER BY u.position",
+    )
+
+    def __init__(
+        self,
+        maxsize: int = cache_config.track_id_cache_size,
+    ) -> None:
+        """Initialize the store."""
+        self._ids: LRUCache[TrackKey, int] = LRUCache(maxsize)
+
+    @staticmethod
+    def key(track: Track) -> TrackKey:
+        """Return the identity tracks are deduplicated by."""
+        return (track.audio_url, track.performer, track.title)
+
+    async def get_ids(
+        self,
+        session: AsyncSession,
+        tracks: Iterable[Track],
+    ) -> dict[TrackKey, int]:
+        """Return the ids of the tracks, inserting the unknown ones."""
+        ids: dict[TrackKey, int] = {}
+        missing: dict[TrackKey, Track] = {}
+
+        for track in tracks:
+            key = self.key(track)
+            if key in ids or key in missing:
+                continue
+
+            track_id = self._ids.get(key)
+            if track_id is None:
+                missing[key] = track
+            else:
+                ids[key] = track_id
+
+        if not missing:
+            return ids
+
+        columns = (StoredTrack.audio_url, StoredTrack.performer)
+        statement = (
+            insert(StoredTrack)
+            .on_conflict_do_nothing(
+                index_elements=[*columns, StoredTrack.title],
+            )
+            .returning(StoredTrack.id, *columns, StoredTrack.title)
+        )
+        result = await session.execute(
+            statement,
+            [
+                {
+                    "name": track.name,
+                    "title": track.title,
+                    "performer": track.performer,
+                    "audio_url": track.audio_url,
+                }
+                for track in missing.values()
+            ],
+        )
+        ids.update({tuple(row[1:]): row[0] for row in result})
+
+        # Tracks that already existed are not returned by the insert.
+        existing = [key for key in missing if key not in ids]
+        if existing:
+            result = await session.execute(
+                select(StoredTrack.id, *columns, StoredTrack.title).where(
+                    tuple_(*columns, StoredTrack.title).in_(existing),
+                ),
+            )
+            ids.update({tuple(row[1:]): row[0] for row in result})
+
+        return ids
+
+    def remember(self, ids: dict[TrackKey, int]) -> None:
+        """Cache ids of tracks whose rows are committed."""
+        for key, track_id in ids.items():
+            self._ids.set(key, track_id)
+
+    async def load_search(
+        self,
+        session: AsyncSession,
+        search_id: int,
+    ) -> list[Track]:
+        """Return the tracks of the search in their original order."""
+        result = await session.execute(
+            self.LOAD_SEARCH,
+            {"search_id": search_id},
+        )
+
+        return [
+            Track(index, row.name, row.title, row.performer, row.audio_url)
+            for index, row in enumerate(result)
+        ]
+
+
+track_store = TrackStore()
@@ -0,0 +1,156 @@
+"""Cache of user rows with batched write-back of changes."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from cache import CacheStats, LRUCache
+from configs import cache_config
+
+from .crud import CRUD
+from .models import User
+
+if TYPE_CHECKING:
+    from .notifier import Notifier
+
+logger = logging.getLogger(__name__)
+
+
+class UserCache:
+    """Keep users in memory and write their changes back in batches."""
+
+    def __init__(
+        self,
+        maxsize: int = cache_config.user_cache_size,
+        ttl: float = cache_config.user_cache_ttl,
+        flush_interval: float = cache_config.user_flush_interval,
+        touch_interval: float = cache_config.user_touch_interval,
+    ) -> None:
+        """Initialize the user cache."""
+        self._users: LRUCache[int, User] = LRUCache(maxsize, ttl)
+        self._dirty: dict[int, dict[str, Any]] = {}
+        self._crud = CRUD(User)
+        self._flush_interval = flush_interval
+        self._touch_interval = timedelta(seconds=touch_interval)
+        self._task: asyncio.Task[None] | None = None
+        self._notifier: Notifier | None = None
+
+    @property
+    def stats(self) -> CacheStats:
+        """Return the hit and miss counters of the cache."""
+        return self._users.stats
+
+    @property
+    def pending(self) -> int:
+        """Return the number of users with unwritten changes."""
+        return len(self._dirty)
+
+    def get(self, user_id: int) -> User | None:
+        """Return the cached user."""
+        return self._users.get(user_id)
+
+    def put(self, user: User) -> None:
+        """Cache the user loaded from the database."""
+        for key, value in self._dirty.get(user.id, {}).items():
+            setattr(user, key, value)
+
+        self._users.set(user.id, user)
+
+    def sync(self, notifier: Notifier) -> None:
+        """Keep the cache consistent with other bot processes."""
+        self._notifier = notifier
+        notifier.subscribe("user", self.invalidate)
+
+    def invalidate(self, user_ids: list[int]) -> None:
+        """Drop the users so that they are loaded again."""
+        for user_id in user_ids:
+            self._users.pop(user_id)
+
+    def update(self, user: User, **kwargs: Any) -> None:  # noqa: ANN401
+        """Apply changed fields to the user and schedule them for writing."""
+        changed = {
+            key: value
+            for key, value in kwargs.items()
+            if getattr(user, key) != value
+        }
+
+        if not changed:
+            return
+
+        for key, value in changed.items():
+            setattr(user, key, value)
+
+        self._dirty.setdefault(user.id, {}).update(changed)
+
+    def touch(self, user: User) -> None:
+        """Refresh updated_at at most once per touch interval."""
+        now = datetime.now()  # noqa: DTZ005
+
+        if user.updated_at is None or (
+            now - user.updated_at >= self._touch_interval
+        ):
+            self.update(user, updated_at=now)
+
+    async def flush(self) -> None:
+        """Write all pending changes in one batch."""
+        if not self._dirty:
+            return
+
+        dirty, self._dirty = self._dirty, {}
+        rows = [{"id": user_id, **fields} for user_id, fields in dirty.items()]
+
+        try:
+            await self._crud.update_many(rows)
+            logger.info("Flushed changes of %d users.", len(rows))
+
+        except SQLAlchemyError:
+            # Keep the failed changes unless newer ones were made meanwhile.
+            for user_id, fields in dirty.items():
+                newer = self._dirty.get(user_id, {})
+                self._dirty[user_id] = {**fields, **newer}
+            logger.warning("Failed to flush changes of %d users", len(rows))
+            return
+
+        if self._notifier is not None:
+            # Other processes only need to reload real profile changes.
+            changed = [
+                user_id
+                for user_id, fields in dirty.items()
+                if fields.keys() - {"updated_at"}
+            ]
+            if changed:
+                await self._notifier.publish("user", changed)
+
+    async def start(self) -> None:
+        """Start flushing changes periodically."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and write the remaining changes."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+        await self.flush()
+
+    async def _run(self) -> None:
+        """Flush changes every flush interval."""
+        while True:
+            await asyncio.sleep(self._flush_interval)
+
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to flush user changes")
+
+
+user_cache = UserCache()
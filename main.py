@@ -2,30 +2,78 @@
 
 import asyncio
 import logging
+import multiprocessing
+import signal
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
+from aiogram.fsm.storage.base import BaseStorage
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.utils.i18n import I18n
 from aiogram.utils.token import TokenValidationError
+from aiogram.webhook.aiohttp_server import (
+    SimpleRequestHandler,
+    setup_application,
+)
+from aiohttp import web
 
 from bot import handlers, middlewares
-from configs import bot_config
-from database.engine import init_db
+from bot.filters import NotSubbedFilter
+from bot.middlewares import ThrottlingMiddleware
+from bot.profile import BotProfile
+from bot.utils import tracks_cache
+from cache import CacheBackend, MemoryCacheBackend
+from configs import (
+    bot_config,
+    cache_config,
+    count_processes,
+    metrics_config,
+    music_config,
+    tracing_config,
+    webhook_config,
+)
+from database.cache_backend import PostgresCacheBackend
+from database.engine import engine, init_db, read_engine
+from database.fsm_storage import PostgresStorage
+from database.instrumentation import pool_status
+from database.notifier import notifier
+from database.retention import history_retention
+from database.search_writer import search_writer
+from database.track_cache import track_cache
+from database.user_cache import user_cache
+from monitoring import (
+    LoopLagMonitor,
+    MetricsServer,
+    SamplingProfiler,
+    registry,
+)
+from monitoring.metrics import LOG_ERRORS, ErrorLogCounter
+from service import Music
+from service.data import ServiceConfig
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(levelname)s:%(name)s - %(message)s",
 )
+logging.getLogger().addHandler(ErrorLogCounter(LOG_ERRORS))
 logger = logging.getLogger(__name__)
 
 
 async def create_bot() -> Bot:
     """Create and return a Bot instance."""
+    session = None
+    if bot_config.api_url:
+        session = AiohttpSession(
+            api=TelegramAPIServer.from_base(bot_config.api_url),
+        )
+
     try:
         bot = Bot(
             token=bot_config.token or "",
+            session=session,
             default=DefaultBotProperties(parse_mode=ParseMode.HTML),
         )
         logger.info("Successfully created bot instance.")
@@ -37,25 +85,317 @@ async def create_bot() -> Bot:
     return bot
 
 
-async def main() -> None:
-    """Start the bot application."""
-    bot = await create_bot()
+def create_search_cache() -> CacheBackend:
+    """Create the search cache backend selected in the configuration."""
+    if cache_config.search_cache_backend == "postgres":
+        return PostgresCacheBackend()
+
+    return MemoryCacheBackend(cache_config.search_cache_size)
+
+
+def create_storage() -> BaseStorage:
+    """Create the FSM storage selected in the configuration."""
+    if bot_config.fsm_storage == "postgres":
+        return PostgresStorage()
+
+    return MemoryStorage()
+
+
+def create_music(search_cache: CacheBackend) -> Music:
+    """Create the music service shared by all handlers."""
+    config = ServiceConfig(
+        base_url=music_config.url,
+        address=music_config.address,
+        search_cache_ttl=cache_config.search_cache_ttl,
+        top_hits_cache_ttl=cache_config.top_hits_cache_ttl,
+        parser=music_config.parser,
+        parse_executor=music_config.parse_executor,
+        parse_workers=music_config.parse_workers,
+        parse_queue_size=music_config.parse_queue_size,
+    )
+    return Music(config, cache=search_cache)
+
+
+def register_metrics(
+    search_cache: CacheBackend,
+    throttling: ThrottlingMiddleware,
+    loop_monitor: LoopLagMonitor,
+) -> None:
+    """Expose the statistics the components already keep as metrics."""
+    caches = {
+        "search": lambda: search_cache.stats,
+        "tracks": lambda: tracks_cache.stats,
+        "users": lambda: user_cache.stats,
+        "file_ids": lambda: track_cache.stats,
+    }
+    engines = {"primary": engine}
+    if read_engine is not engine:
+        engines["replica"] = read_engine
+
+    def pool_samples(field: str) -> list[tuple[tuple[str, ...], float]]:
+        return [
+            ((name,), pool_status(pool_engine).get(field, 0))
+            for name, pool_engine in engines.items()
+        ]
+
+    registry.gauge(
+        "cache_hits_total",
+        "Lookups served from the cache.",
+        lambda: [((name,), stats().hits) for name, stats in caches.items()],
+        ("cache",),
+        kind="counter",
+    )
+    registry.gauge(
+        "cache_misses_total",
+        "Lookups not found in the cache.",
+        lambda: [((name,), stats().misses) for name, stats in caches.items()],
+        ("cache",),
+        kind="counter",
+    )
+    registry.gauge(
+        "throttling_queue_depth",
+        "Bot API requests waiting for the global rate limit.",
+        lambda: [((), throttling.global_bucket.queue_depth)],
+    )
+    registry.gauge(
+        "throttling_wait_seconds_total",
+        "Time requests waited for the global rate limit.",
+        lambda: [
+            ((priority.name.lower(),), stats.total)
+            for priority, stats in throttling.global_bucket.wait_stats.items()
+        ],
+        ("priority",),
+        kind="counter",
+    )
+    registry.gauge(
+        "throttling_retries_total",
+        "Requests sent again after a flood limit response.",
+        lambda: [((), throttling.retries)],
+        kind="counter",
+    )
+    registry.gauge(
+        "event_loop_lag_seconds",
+        "Delay of the last event loop wake-up.",
+        lambda: [((), loop_monitor.last_lag)],
+    )
+    registry.gauge(
+        "event_loop_blocked_seconds_total",
+        "Time the event loop was blocked.",
+        lambda: [((), loop_monitor.blocked_time)],
+        kind="counter",
+    )
+    registry.gauge(
+        "db_pool_connections_in_use",
+        "Connections checked out of the pool.",
+        lambda: pool_samples("in_use"),
+        ("pool",),
+    )
+    registry.gauge(
+        "db_pool_checkouts_total",
+        "Connections taken from the pool.",
+        lambda: pool_samples("checkouts"),
+        ("pool",),
+        kind="counter",
+    )
+    registry.gauge(
+        "db_pool_checkout_wait_seconds_max",
+        "Longest wait for a pool connection.",
+        lambda: pool_samples("max_checkout_wait"),
+        ("pool",),
+    )
+    registry.gauge(
+        "db_slow_queries_total",
+        "Queries slower than the configured threshold.",
+        lambda: pool_samples("slow_queries"),
+        ("pool",),
+        kind="counter",
+    )
+    registry.gauge(
+        "write_buffer_pending",
+        "Changes waiting to be written to the database.",
+        lambda: [
+            (("searches",), search_writer.pending),
+            (("users",), user_cache.pending),
+        ],
+        ("buffer",),
+    )
+
+
+async def create_dispatcher(bot: Bot, worker: int = 0) -> Dispatcher:
+    """Create the dispatcher with all services, middlewares and handlers."""
+    processes = count_processes()
+    throttling = middlewares.setup_session(bot, processes)
+
+    search_cache = create_search_cache()
+    music = create_music(search_cache)
+    logger.info("Successfully created music service instance.")
 
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
     i18n = I18n(path="locales", domain="messages")
+    bot_profile = BotProfile(i18n, bot_config.profile_refresh_interval)
+
+    storage = create_storage()
+    dp = Dispatcher(storage=storage, music=music, bot_profile=bot_profile)
+    dp.startup.register(music.connect)
+    dp.startup.register(bot_profile.start)
+    dp.shutdown.register(bot_profile.stop)
+    dp.shutdown.register(music.disconnect)
     logger.info("Successfully created dispatcher, i18n and storage instance.")
 
-    middlewares.setup(dp, i18n)
+    dp.startup.register(search_writer.start)
+    dp.shutdown.register(search_writer.stop)
+    dp.startup.register(history_retention.start)
+    dp.shutdown.register(history_retention.stop)
+
+    loop_monitor = LoopLagMonitor()
+    dp.startup.register(loop_monitor.start)
+    dp.shutdown.register(loop_monitor.stop)
+
+    register_metrics(search_cache, throttling, loop_monitor)
+    profiler = SamplingProfiler(
+        tracing_config.profile_interval,
+        tracing_config.profile_handlers,
+        tracing_config.profile_users,
+    )
+    if metrics_config.port:
+        metrics_server = MetricsServer(
+            metrics_config.host,
+            metrics_config.port + worker,
+            profiler=profiler,
+            token=tracing_config.profile_token,
+        )
+        dp.startup.register(metrics_server.start)
+        dp.shutdown.register(metrics_server.stop)
+
+    middlewares.setup(dp, i18n, profiler)
     logger.info("Successfully set up middleware.")
 
+    # A single process keeps no LISTEN connection: its user cache is the
+    # only one, and it rereads the required chats after SUBS_CACHE_TTL or
+    # when the user asks to check the subscription.
+    if processes > 1:
+        NotSubbedFilter.sync(notifier)
+        user_cache.sync(notifier)
+        # Registered after the user cache so that its final flush is sent.
+        dp.startup.register(notifier.start)
+        dp.shutdown.register(notifier.stop)
+
     handlers.setup(dp)
     logger.info("Successfully set up handlers.")
 
+    return dp
+
+
+async def main() -> None:
+    """Start the bot application with long polling."""
+    bot = await create_bot()
+    dp = await create_dispatcher(bot)
+
     await init_db()
     await dp.start_polling(bot)
 
 
+async def set_webhook(bot: Bot, dp: Dispatcher) -> None:
+    """Register the webhook for the updates the handlers use."""
+    await bot.set_webhook(
+        f"{webhook_config.url}{webhook_config.path}",
+        secret_token=webhook_config.secret,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+    logger.info("Webhook set to %s", webhook_config.url)
+
+
+async def prepare_webhook() -> None:
+    """Create the tables and register the webhook once for all workers."""
+    await init_db()
+
+    bot = await create_bot()
+    dp = await create_dispatcher(bot)
+    async with bot.session:
+        await set_webhook(bot, dp)
+
+    # The spawned workers open their own pools, this one is not used again.
+    await engine.dispose()
+
+
+async def health_handler(_: web.Request) -> web.Response:
+    """Report that the worker is alive, details are in the metrics."""
+    return web.json_response({"status": "ok"})
+
+
+async def create_webhook_app(
+    worker: int = 0,
+    *,
+    prepare: bool = False,
+) -> web.Application:
+    """Create the aiohttp application that receives webhook updates."""
+    bot = await create_bot()
+    dp = await create_dispatcher(bot, worker)
+    if prepare:
+        # A single worker prepares with its own dispatcher.
+        await init_db()
+        await set_webhook(bot, dp)
+
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=webhook_config.secret,
+        handle_in_background=webhook_config.background,
+    ).register(app, path=webhook_config.path)
+    # The app is public, metrics stay on the MetricsServer of the worker.
+    app.router.add_get("/health", health_handler)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+def run_webhook_worker(worker: int = 0, *, prepare: bool = False) -> None:
+    """Serve webhook updates until the process is stopped."""
+    web.run_app(
+        create_webhook_app(worker, prepare=prepare),
+        host=webhook_config.host,
+        port=webhook_config.port,
+        reuse_port=webhook_config.workers > 1,
+        print=None,
+    )
+
+
+def run_webhook() -> None:
+    """Start the bot application with one or more webhook workers."""
+    if webhook_config.workers == 1:
+        run_webhook_worker(prepare=True)
+        return
+
+    asyncio.run(prepare_webhook())
+
+    # The kernel spreads connections between the workers bound to the port.
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(
+            target=run_webhook_worker,
+            args=(number,),
+            name=f"worker-{number}",
+        )
+        for number in range(webhook_config.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    logger.info("Started %d webhook workers", len(workers))
+
+    def stop(*_: object) -> None:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for worker in workers:
+        worker.join()
+
+
 if __name__ == "__main__":
     logger.info("Starting application...")
-    asyncio.run(main())
+    if webhook_config.mode == "webhook":
+        run_webhook()
+    else:
+        asyncio.run(main())
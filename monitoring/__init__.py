@@ -0,0 +1,21 @@
+"""Runtime monitoring of the bot process."""
+
+from .loop import LoopLagMonitor
+from .metrics import Counter, Histogram, Registry, registry
+from .profiler import SamplingProfiler
+from .server import MetricsServer, create_metrics_handler
+from .tracing import Span, Trace, span
+
+__all__ = [
+    "Counter",
+    "Histogram",
+    "LoopLagMonitor",
+    "MetricsServer",
+    "Registry",
+    "SamplingProfiler",
+    "Span",
+    "Trace",
+    "create_metrics_handler",
+    "registry",
+    "span",
+]
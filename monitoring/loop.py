@@ -0,0 +1,54 @@
+"""Event loop responsiveness monitor."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """Measure how long the event loop is blocked between wake-ups."""
+
+    def __init__(
+        self,
+        interval: float = 0.5,
+        warn_threshold: float = 0.1,
+    ) -> None:
+        """Initialize the monitor."""
+        self.interval = interval
+        self.warn_threshold = warn_threshold
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.blocked_time = 0.0
+        self._task: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        """Start measuring in a background task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop measuring."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        """Sleep for the interval and record how late the loop woke up."""
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - started - self.interval, 0.0)
+
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.blocked_time += lag
+
+            if lag > self.warn_threshold:
+                logger.warning("Event loop was blocked for %.3f s", lag)
@@ -0,0 +1,356 @@
+"""Metrics in the Prometheus text exposition format."""
+
+from __future__ import annotations
+
+import logging
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+# Seconds, from a cache hit to a slow upload.
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+Sample = tuple[tuple[str, ...], float]
+
+logger = logging.getLogger(__name__)
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    """Return the label set of a sample."""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    )
+    return f"{{{pairs}}}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def _format_value(value: float) -> str:
+    """Return the sample value as Prometheus expects it."""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric(ABC):
+    """Base class of a metric family with optional labels."""
+
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+    ) -> None:
+        """Initialize the metric family."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def render(self) -> Iterator[str]:
+        """Yield the lines of the metric family."""
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self._render_samples()
+
+    @abstractmethod
+    def _render_samples(self) -> Iterator[str]:
+        """Yield the sample lines."""
+
+
+class Counter(Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+    ) -> None:
+        """Initialize the counter."""
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Increase the counter of the label values."""
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def _render_samples(self) -> Iterator[str]:
+        """Yield one sample per label set."""
+        for labels, value in self._values.items():
+            yield (
+                f"{self.name}{_format_labels(self.labelnames, labels)} "
+                f"{_format_value(value)}"
+            )
+
+
+class _HistogramChild:
+    """Bucket counts of one label set."""
+
+    __slots__ = ("buckets", "count", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        """Initialize empty buckets."""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+class Histogram(Metric):
+    """Distribution of observed values per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Initialize the histogram."""
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._children: dict[tuple[str, ...], _HistogramChild] = {}
+
+    def labels(self, *labels: str) -> _HistogramChild:
+        """Return the buckets of the label values."""
+        child = self._children.get(labels)
+
+        if child is None:
+            child = self._children[labels] = _HistogramChild(self.buckets)
+
+        return child
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record one observation for the label values."""
+        self.labels(*labels).observe(value)
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        """Observe how long the block takes."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.labels(*labels).observe(time.perf_counter() - started)
+
+    def _render_samples(self) -> Iterator[str]:
+        """Yield the cumulative buckets, sum and count per label set."""
+        bucket_names = (*self.labelnames, "le")
+
+        for labels, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(
+                (*self.buckets, float("inf")),
+                child.counts,
+            ):
+                cumulative += count
+                bucket_labels = _format_labels(
+                    bucket_names,
+                    (*labels, _format_value(bound)),
+                )
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+
+            label_set = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_set} {_format_value(child.sum)}"
+            yield f"{self.name}_count{label_set} {child.count}"
+
+
+class CallbackMetric(Metric):
+    """Metric whose samples are read from existing state on collection."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Iterable[Sample]],
+        labelnames: tuple[str, ...] = (),
+        kind: str = "gauge",
+    ) -> None:
+        """Initialize the metric with the callback returning its samples."""
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.callback = callback
+
+    def _render_samples(self) -> Iterator[str]:
+        """Yield the samples returned by the callback."""
+        for labels, value in self.callback():
+            yield (
+                f"{self.name}{_format_labels(self.labelnames, labels)} "
+                f"{_format_value(value)}"
+            )
+
+
+class Registry:
+    """Collection of the metrics exposed by the process."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """Add the metric, replacing one with the same name."""
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+    ) -> Counter:
+        """Create and register a counter."""
+        metric = Counter(name, documentation, labelnames)
+        self.register(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Create and register a histogram."""
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self.register(metric)
+        return metric
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Iterable[Sample]],
+        labelnames: tuple[str, ...] = (),
+        kind: str = "gauge",
+    ) -> CallbackMetric:
+        """Register a metric read from existing state when collected."""
+        metric = CallbackMetric(
+            name,
+            documentation,
+            callback,
+            labelnames,
+            kind,
+        )
+        self.register(metric)
+        return metric
+
+    def render(self) -> str:
+        """Return every metric in the text exposition format."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                logger.exception("Failed to collect %s", metric.name)
+
+        return "\n".join(lines) + "\n"
+
+
+class ErrorLogCounter(logging.Handler):
+    """Count the error records logged by every logger."""
+
+    def __init__(self, counter: Counter) -> None:
+        """Initialize the handler with the counter to increase."""
+        super().__init__(logging.ERROR)
+        self.counter = counter
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Count the record by the name of its logger."""
+        self.counter.inc(record.name)
+
+
+registry = Registry()
+
+HANDLER_DURATION = registry.histogram(
+    "bot_handler_duration_seconds",
+    "Time spent in update handlers.",
+    ("handler",),
+)
+HANDLER_ERRORS = registry.counter(
+    "bot_handler_errors_total",
+    "Exceptions raised by update handlers.",
+    ("handler",),
+)
+UPDATE_DURATION = registry.histogram(
+    "bot_update_duration_seconds",
+    "Time spent processing updates, middlewares included.",
+    ("type",),
+)
+LOG_ERRORS = registry.counter(
+    "bot_log_errors_total",
+    "Records logged at error level or above.",
+    ("logger",),
+)
+TELEGRAM_DURATION = registry.histogram(
+    "telegram_request_duration_seconds",
+    "Time spent in Bot API requests.",
+    ("method",),
+)
+TELEGRAM_ERRORS = registry.counter(
+    "telegram_request_errors_total",
+    "Failed Bot API requests.",
+    ("method", "error"),
+)
+UPSTREAM_DURATION = registry.histogram(
+    "upstream_request_duration_seconds",
+    "Time until the music site responded.",
+    ("operation",),
+)
+UPSTREAM_ERRORS = registry.counter(
+    "upstream_request_errors_total",
+    "Failed requests to the music site.",
+    ("operation",),
+)
+PARSE_DURATION = registry.histogram(
+    "upstream_parse_duration_seconds",
+    "Time spent parsing pages of the music site.",
+)
+DB_DURATION = registry.histogram(
+    "db_call_duration_seconds",
+    "Time spent in CRUD calls.",
+    ("model", "operation"),
+)
+DB_ERRORS = registry.counter(
+    "db_call_errors_total",
+    "Failed CRUD calls.",
+    ("model", "operation"),
+)
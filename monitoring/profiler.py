@@ -0,0 +1,150 @@
+"""Sampling profiler for selected handlers and users."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from types import FrameType
+
+logger = logging.getLogger(__name__)
+
+
+class SamplingProfiler:
+    """Sample the call stacks of the selected updates from a thread.
+
+    While an update of a selected handler or user is being handled, a
+    background thread periodically records the stack of the event loop
+    thread whenever the update's task is the one running, so the profile
+    shows where the update spends CPU time; time spent waiting is in its
+    span tree. Stacks are aggregated in the folded format understood by
+    flame graph tools. Nothing runs while no update is selected.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.005,
+        handlers: Iterable[str] = (),
+        users: Iterable[int] = (),
+    ) -> None:
+        """Initialize the profiler with the updates selected at start."""
+        self.interval = interval
+        self.handlers: set[str] = set(handlers)
+        self.users: set[int] = set(users)
+        self.samples = 0
+        self._stacks: Counter[str] = Counter()
+        self._tasks: set[asyncio.Task[object]] = set()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+
+    @property
+    def enabled(self) -> bool:
+        """Check if any handler or user is selected."""
+        return bool(self.handlers or self.users)
+
+    def selects(self, handler: str, user_id: int | None) -> bool:
+        """Check if updates of the handler and user are profiled."""
+        return handler in self.handlers or user_id in self.users
+
+    def select(
+        self,
+        handlers: Iterable[str] = (),
+        users: Iterable[int] = (),
+    ) -> None:
+        """Start profiling the updates of the handlers and users."""
+        self.handlers.update(handlers)
+        self.users.update(users)
+        logger.info(
+            "Profiling handlers %s and users %s",
+            sorted(self.handlers),
+            sorted(self.users),
+        )
+
+    def clear(self) -> None:
+        """Stop profiling and forget the collected stacks."""
+        self.handlers.clear()
+        self.users.clear()
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+
+    def folded(self) -> str:
+        """Return the collected stacks with their sample counts."""
+        with self._lock:
+            lines = [
+                f"{stack} {count}"
+                for stack, count in self._stacks.most_common()
+            ]
+
+        return "\n".join(lines) + "\n" if lines else ""
+
+    @contextmanager
+    def profile(self) -> Iterator[None]:
+        """Sample the current task until the block is left."""
+        task = asyncio.current_task()
+
+        if task is None:
+            yield
+            return
+
+        self._tasks.add(task)
+        self._ensure_thread()
+
+        try:
+            yield
+        finally:
+            self._tasks.discard(task)
+
+    def _ensure_thread(self) -> None:
+        """Start the sampling thread if it is not running."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="sampling-profiler",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        """Sample until no profiled update is left."""
+        while self._tasks:
+            time.sleep(self.interval)
+            task = asyncio.current_task(self._loop)
+
+            if task not in self._tasks:
+                continue
+
+            frames = sys._current_frames()  # noqa: SLF001
+            frame = frames.get(self._loop_thread_id)
+            if frame is not None:
+                stack = self._fold(frame)
+                with self._lock:
+                    self._stacks[stack] += 1
+                    self.samples += 1
+
+    @staticmethod
+    def _fold(frame: FrameType | None) -> str:
+        """Return the stack from the outermost call, separated by ';'."""
+        names = []
+
+        while frame is not None:
+            code = frame.f_code
+            module = frame.f_globals.get("__name__", "?")
+            names.append(f"{module}.{code.co_qualname}")
+            frame = frame.f_back
+
+        return ";".join(reversed(names))
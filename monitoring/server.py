@@ -0,0 +1,123 @@
+"""HTTP endpoint exposing the metrics."""
+
+from __future__ import annotations
+
+import hmac
+import logging
+from typing import TYPE_CHECKING
+
+from aiohttp import web
+
+from .metrics import Registry, registry
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from .profiler import SamplingProfiler
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def create_metrics_handler(
+    metrics: Registry = registry,
+) -> Callable[[web.Request], Awaitable[web.Response]]:
+    """Return an aiohttp handler rendering the registry."""
+
+    async def metrics_handler(_: web.Request) -> web.Response:
+        return web.Response(
+            body=metrics.render().encode(),
+            headers={"Content-Type": CONTENT_TYPE},
+        )
+
+    return metrics_handler
+
+
+class MetricsServer:
+    """HTTP server for the /metrics of one process, in every bot mode.
+
+    With a profiler and a token it also serves /debug/profile: POST with
+    ``handler`` and ``user`` query parameters selects updates to profile,
+    GET returns the collected stacks and DELETE stops profiling. Requests
+    must carry the token as ``Authorization: Bearer <token>``.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        host: str,
+        port: int,
+        metrics: Registry = registry,
+        profiler: SamplingProfiler | None = None,
+        token: str | None = None,
+    ) -> None:
+        """Initialize the server."""
+        self.host = host
+        self.port = port
+        self.metrics = metrics
+        self.profiler = profiler
+        self.token = token
+        self._runner: web.AppRunner | None = None
+
+    async def start(self) -> None:
+        """Start listening for scrapes."""
+        if self._runner is not None:
+            return
+
+        app = web.Application()
+        app.router.add_get("/metrics", create_metrics_handler(self.metrics))
+        if self.profiler is not None and self.token:
+            app.router.add_get("/debug/profile", self._get_profile)
+            app.router.add_post("/debug/profile", self._select_profile)
+            app.router.add_delete("/debug/profile", self._clear_profile)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info("Serving metrics on %s:%d", self.host, self.port)
+
+    async def stop(self) -> None:
+        """Stop the server."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _get_profiler(self, request: web.Request) -> SamplingProfiler:
+        """Return the profiler if the request carries the token."""
+        if self.profiler is None or not self.token:
+            raise web.HTTPNotFound
+
+        expected = f"Bearer {self.token}".encode()
+        given = request.headers.get("Authorization", "").encode()
+        if not hmac.compare_digest(given, expected):
+            raise web.HTTPUnauthorized
+
+        return self.profiler
+
+    async def _get_profile(self, request: web.Request) -> web.Response:
+        """Return the stacks collected so far in the folded format."""
+        profiler = self._get_profiler(request)
+
+        return web.Response(text=profiler.folded())
+
+    async def _select_profile(self, request: web.Request) -> web.Response:
+        """Select the handlers and users whose updates are profiled."""
+        profiler = self._get_profiler(request)
+
+        try:
+            users = [int(user) for user in request.query.getall("user", [])]
+        except ValueError:
+            raise web.HTTPBadRequest(text="user must be an id") from None
+
+        profiler.select(request.query.getall("handler", []), users)
+        return web.json_response(
+            {
+                "handlers": sorted(profiler.handlers),
+                "users": sorted(profiler.users),
+            },
+        )
+
+    async def _clear_profile(self, request: web.Request) -> web.Response:
+        """Stop profiling and drop the collected stacks."""
+        self._get_profiler(request).clear()
+        return web.Response(status=204)
@@ -0,0 +1,138 @@
+"""Span trees of updates and the log of slow ones."""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from contextvars import Token
+    from types import TracebackType
+
+slow_logger = logging.getLogger("bot.slow_updates")
+
+_current: ContextVar[Span | None] = ContextVar("span", default=None)
+
+
+class Span:
+    """Timed section of an update with its nested sections."""
+
+    __slots__ = ("children", "ended", "error", "name", "started")
+
+    def __init__(self, name: str) -> None:
+        """Start the span."""
+        self.name = name
+        self.started = time.perf_counter()
+        self.ended: float | None = None
+        self.error: str | None = None
+        self.children: list[Span] = []
+
+    @property
+    def duration(self) -> float:
+        """Return the seconds the span took or has taken so far."""
+        ended = self.ended if self.ended is not None else time.perf_counter()
+        return ended - self.started
+
+    def finish(self) -> None:
+        """Stop the span."""
+        self.ended = time.perf_counter()
+
+    def to_dict(self, origin: float | None = None) -> dict[str, Any]:
+        """Return the span tree with times in milliseconds."""
+        origin = self.started if origin is None else origin
+        result: dict[str, Any] = {
+            "name": self.name,
+            "start_ms": round((self.started - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+        }
+
+        if self.error is not None:
+            result["error"] = self.error
+
+        if self.children:
+            result["children"] = [
+                child.to_dict(origin) for child in self.children
+            ]
+
+        return result
+
+
+class span:  # noqa: N801
+    """Record a section as a child of the current span.
+
+    Outside of a traced update entering and leaving costs one context
+    variable lookup, so sections can be marked on hot paths.
+    """
+
+    __slots__ = ("_parts", "_span", "_token")
+
+    def __init__(self, *parts: str) -> None:
+        """Remember the name parts, joined only when the span is recorded."""
+        self._parts = parts
+        self._span: Span | None = None
+        self._token: Token[Span | None] | None = None
+
+    def __enter__(self) -> Span | None:
+        """Start the span if the update is traced."""
+        parent = _current.get()
+
+        if parent is None:
+            return None
+
+        self._span = Span(":".join(self._parts))
+        parent.children.append(self._span)
+        self._token = _current.set(self._span)
+        return self._span
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Stop the span and make its parent current again."""
+        if self._span is None or self._token is None:
+            return
+
+        self._span.finish()
+        if exc_type is not None:
+            self._span.error = exc_type.__name__
+        _current.reset(self._token)
+
+
+class Trace:
+    """Root span of one update, logged when the update is slow."""
+
+    __slots__ = ("attributes", "root", "threshold", "token")
+
+    def __init__(self, name: str, threshold: float) -> None:
+        """Start tracing the sections run in the current context."""
+        self.root = Span(name)
+        self.threshold = threshold
+        self.attributes: dict[str, Any] = {}
+        self.token = _current.set(self.root)
+
+    def finish(self) -> None:
+        """Stop tracing and log the span tree if the update was slow."""
+        self.root.finish()
+        _current.reset(self.token)
+
+        if self.root.duration >= self.threshold:
+            slow_logger.warning(
+                json.dumps(
+                    {
+                        **self.attributes,
+                        "duration_ms": round(self.root.duration * 1000, 3),
+                        "spans": self.root.to_dict(),
+                    },
+                    ensure_ascii=False,
+                ),
+            )
+
+
+def current_span() -> Span | None:
+    """Return the innermost span of the traced update, if any."""
+    return _current.get()
@@ -2,34 +2,70 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import re
-from typing import TYPE_CHECKING
+import time
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import TYPE_CHECKING, ClassVar
 
 import aiohttp
 from aiohttp import ClientTimeout
-from bs4 import BeautifulSoup, Tag
 from tenacity import retry, stop_after_attempt, wait_exponential
 from typing_extensions import Self
 
+from cache import SingleFlight
+from monitoring.metrics import (
+    PARSE_DURATION,
+    UPSTREAM_DURATION,
+    UPSTREAM_ERRORS,
+)
+from monitoring.tracing import span
+
 from .data import ServiceConfig, Track
 from .exceptions import MusicServiceError
+from .parser import get_parser
+from .resolver import PinnedResolver
 
 if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
     from types import TracebackType
 
+    from cache import CacheBackend
+
 logger = logging.getLogger(__name__)
 
 
 class Music:
     """Service for searching and downloading music."""
 
-    BASE_URL = "vuxo7.com"
+    EXECUTORS: ClassVar[dict[str, type[Executor]]] = {
+        "thread": ThreadPoolExecutor,
+        "process": ProcessPoolExecutor,
+    }
+    # Cached entries are rows of tracks, the prefix keeps them apart from
+    # entries of the former dictionary format.
+    CACHE_PREFIX = "rows:"
 
-    def __init__(self, config: ServiceConfig | None = None) -> None:
-        """Initialize music service with optional configuration."""
+    def __init__(
+        self,
+        config: ServiceConfig | None = None,
+        cache: CacheBackend | None = None,
+    ) -> None:
+        """Initialize music service with optional configuration and cache."""
         self._config = config or ServiceConfig()
+        self._cache = cache
+        self._parser = get_parser(self._config.parser)
         self._session: aiohttp.ClientSession | None = None
+        self._inflight: SingleFlight[list[Track]] = SingleFlight()
+        self._executor: Executor | None = None
+        self._parse_slots = asyncio.Semaphore(
+            self._config.parse_workers + self._config.parse_queue_size,
+        )
 
     async def __aenter__(self) -> Self:
         """Context manager entry point."""
@@ -46,16 +82,47 @@ class Music:
         await self.disconnect()
 
     async def connect(self) -> None:
-        """Initialize HTTP session."""
+        """Initialize HTTP session and the parsing worker pool."""
+        if self._executor is None:
+            self._executor = self._create_executor()
+
         if self._session is None:
-            self._session = aiohttp.ClientSession(headers=self._config.headers)
+            connector = aiohttp.TCPConnector(
+                limit=self._config.connection_limit,
+                limit_per_host=self._config.connection_limit_per_host,
+                keepalive_timeout=self._config.keepalive_timeout,
+                ttl_dns_cache=self._config.dns_cache_ttl,
+                resolver=(
+                    PinnedResolver(self._config.address)
+                    if self._config.address
+                    else None
+                ),
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self._config.headers,
+            )
 
     async def disconnect(self) -> None:
-        """Close HTTP session."""
+        """Close HTTP session and the parsing worker pool."""
         if self._session:
             await self._session.close()
             self._session = None
 
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _create_executor(self) -> Executor:
+        """Create the worker pool selected in the configuration."""
+        try:
+            executor_class = self.EXECUTORS[self._config.parse_executor]
+        except KeyError:
+            msg = f"Unknown parse executor: {self._config.parse_executor}"
+            raise MusicServiceError(msg) from None
+
+        return executor_class(max_workers=self._config.parse_workers)
+
     async def search(self, keyword: str) -> list[Track]:
         """Search for music by keyword."""
         if not self._session:
@@ -65,11 +132,42 @@ class Music:
         url = self.build_search_query(keyword)
         logger.info("Searching music with keyword: %s", keyword)
 
-        return await self._parse_tracks(url)
+        return await self._get_tracks(url, self._config.search_cache_ttl)
 
     async def get_top_hits(self) -> list[Track]:
         """Get top tracks."""
-        return await self._parse_tracks(f"https://{self.BASE_URL}")
+        return await self._get_tracks(
+            self._config.base_url,
+            self._config.top_hits_cache_ttl,
+        )
+
+    async def _get_tracks(self, url: str, ttl: float) -> list[Track]:
+        """Get tracks from the cache or parse them once per concurrent URL."""
+        if self._cache is not None:
+            cached = await self._cache.get(self.CACHE_PREFIX + url)
+            if cached is not None:
+                return [Track.from_row(row) for row in cached]
+
+        tracks = await self._inflight.do(
+            url,
+            lambda: self._parse_and_cache_tracks(url, ttl),
+        )
+        return list(tracks)
+
+    async def _parse_and_cache_tracks(
+        self,
+        url: str,
+        ttl: float,
+    ) -> list[Track]:
+        """Parse tracks from the given URL and store them in the cache."""
+        tracks = await self._parse_tracks(url)
+
+        if self._cache is not None:
+            # Tracks are tuples, the memory backend shares them and the
+            # database backend stores them as JSON arrays.
+            await self._cache.set(self.CACHE_PREFIX + url, tuple(tracks), ttl)
+
+        return tracks
 
     @retry(
         stop=stop_after_attempt(3),
@@ -82,77 +180,134 @@ class Music:
                 msg = "Failed to initialize session"
                 raise MusicServiceError(msg)
 
-            async with self._session.get(
-                url,
-                timeout=ClientTimeout(total=self._config.timeout),
-            ) as response:
-                response.raise_for_status()
-                soup = BeautifulSoup(await response.text(), "html.parser")
-                playlist = soup.find("ul", class_="playlist")
-
-                if not isinstance(playlist, Tag):
-                    msg = "Could not find playlist element"
-                    raise TypeError(msg)
-
-                tracks = [
-                    Track.from_element(track_data, index)
-                    for index, track_data in enumerate(
-                        playlist.find_all("li"),
-                    )
-                ]
+            with UPSTREAM_DURATION.time("page"), span("upstream", "page"):
+                async with self._session.get(
+                    url,
+                    timeout=ClientTimeout(total=self._config.timeout),
+                ) as response:
+                    response.raise_for_status()
+                    html = await response.text()
 
+            with PARSE_DURATION.time(), span("upstream", "parse"):
+                tracks = await self._parse_html(html)
             logger.info("Found %d tracks", len(tracks))
 
         except (aiohttp.ClientError, TimeoutError) as e:
+            UPSTREAM_ERRORS.inc("page")
             msg = f"Failed to search music: {e!s}"
             raise MusicServiceError(msg) from e
 
         return tracks
 
+    async def _parse_html(self, html: str) -> list[Track]:
+        """Parse the page in the worker pool, waiting while it is full."""
+        if not self._executor:
+            msg = "Failed to initialize parse executor"
+            raise MusicServiceError(msg)
+
+        async with self._parse_slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor,
+                self._parser.parse,
+                html,
+            )
+
     def _raise_file_too_large_error(self, content_length: int) -> None:
         """Raise an error for files that are too large."""
         msg = f"File too large: {content_length} bytes"
         raise MusicServiceError(msg)
 
-    async def _download_data(
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=1, max=5),
+    )
+    async def _open_stream(
         self,
         url: str,
         resource_type: str,
         track_name: str,
-    ) -> bytes:
-        """Download data."""
-        max_size = 50 * 1024 * 1024  # 50MB
-
+    ) -> aiohttp.ClientResponse:
+        """Open a streaming response for the given URL."""
         if not self._session:
             msg = "Failed to initialize session"
             raise MusicServiceError(msg)
 
         logger.info("Downloading %s for track: %s", resource_type, track_name)
+        started = time.perf_counter()
 
         try:
-            async with self._session.get(
-                url,
-                timeout=ClientTimeout(total=self._config.timeout),
-            ) as response:
-                response.raise_for_status()
-                content_length = response.content_length
+            with span("upstream", resource_type):
+                response = await self._session.get(
+                    url,
+                    timeout=ClientTimeout(
+                        sock_connect=self._config.timeout,
+                        sock_read=self._config.timeout,
+                    ),
+                )
+        except (aiohttp.ClientError, TimeoutError) as e:
+            UPSTREAM_ERRORS.inc(resource_type)
+            msg = f"Failed to download {resource_type}"
+            raise MusicServiceError(msg) from e
+
+        # Time to the response headers, the body is streamed by the caller.
+        UPSTREAM_DURATION.observe(time.perf_counter() - started, resource_type)
+
+        try:
+            response.raise_for_status()
+            content_length = response.content_length
+
+            if content_length and content_length > self._config.max_file_size:
+                self._raise_file_too_large_error(content_length)
+
+        except aiohttp.ClientError as e:
+            response.release()
+            UPSTREAM_ERRORS.inc(resource_type)
+            msg = f"Failed to download {resource_type}"
+            raise MusicServiceError(msg) from e
 
-                if content_length and content_length > max_size:
-                    self._raise_file_too_large_error(content_length)
+        except MusicServiceError:
+            response.release()
+            raise
 
-                return await response.read()
+        return response
+
+    async def _stream_data(
+        self,
+        url: str,
+        resource_type: str,
+        track_name: str,
+    ) -> AsyncGenerator[bytes, None]:
+        """Stream data in chunks without buffering the whole body."""
+        response = await self._open_stream(url, resource_type, track_name)
+        downloaded = 0
+
+        try:
+            async for chunk in response.content.iter_chunked(
+                self._config.chunk_size,
+            ):
+                downloaded += len(chunk)
+
+                if downloaded > self._config.max_file_size:
+                    self._raise_file_too_large_error(downloaded)
+
+                yield chunk
 
         except (aiohttp.ClientError, TimeoutError) as e:
+            UPSTREAM_ERRORS.inc(resource_type)
             msg = f"Failed to download {resource_type}"
             raise MusicServiceError(msg) from e
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=5),
-    )
+        finally:
+            response.release()
+
+    def stream_audio(self, track: Track) -> AsyncGenerator[bytes, None]:
+        """Stream music file in chunks."""
+        return self._stream_data(track.audio_url, "audio", track.name)
+
     async def get_audio_bytes(self, track: Track) -> bytes:
         """Download music file."""
-        return await self._download_data(track.audio_url, "audio", track.name)
+        return b"".join([chunk async for chunk in self.stream_audio(track)])
 
     def build_search_query(self, keyword: str) -> str:
         """Build search query with cleaned keyword."""
@@ -164,4 +319,5 @@ class Music:
         except UnicodeError:
             subdomain = query
 
-        return f"https://{subdomain}.{self.BASE_URL}"
+        scheme, _, host = self._config.base_url.partition("://")
+        return f"{scheme}://{subdomain}.{host}"
@@ -5,10 +5,15 @@ from __future__ import annotations
 import json
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, NamedTuple
 
 from bs4 import BeautifulSoup, Tag
 
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+TrackRow = tuple[int, str, str, str, str]
+
 headers_path = Path(__file__).parent / "headers.json"
 
 
@@ -16,7 +21,21 @@ headers_path = Path(__file__).parent / "headers.json"
 class ServiceConfig:
     """Configuration for music service."""
 
+    base_url: str = "https://vuxo7.com"
+    address: str | None = None
     timeout: int = 30
+    chunk_size: int = 64 * 1024  # 64KB
+    max_file_size: int = 50 * 1024 * 1024  # 50MB
+    connection_limit: int = 100
+    connection_limit_per_host: int = 20
+    keepalive_timeout: float = 60
+    dns_cache_ttl: int = 300
+    search_cache_ttl: float = 300
+    top_hits_cache_ttl: float = 1800
+    parser: str = "fast"
+    parse_executor: str = "thread"
+    parse_workers: int = 2
+    parse_queue_size: int = 32
     headers: dict = field(
         default_factory=lambda: json.load(
             Path.open(headers_path, encoding="utf-8"),
@@ -24,9 +43,13 @@ class ServiceConfig:
     )
 
 
-@dataclass
-class Track:
-    """Track data class."""
+class Track(NamedTuple):
+    """Track data class.
+
+    Tracks are immutable tuples without a per-instance dictionary, so the
+    caches share them instead of copying, and they are stored as rows of
+    the fields in order: a JSON array instead of an object per track.
+    """
 
     index: int
     name: str
@@ -34,15 +57,42 @@ class Track:
     performer: str
     audio_url: str
 
+    @property
+    def cache_key(self) -> str:
+        """Return a stable identity of the track."""
+        return self.audio_url
+
+    def to_row(self) -> TrackRow:
+        """Convert Track to a plain tuple of its fields."""
+        return (
+            self.index,
+            self.name,
+            self.title,
+            self.performer,
+            self.audio_url,
+        )
+
+    @classmethod
+    def from_row(cls, row: Iterable[Any]) -> Track:
+        """Create Track from its fields in order, tracks are kept as is."""
+        if isinstance(row, cls):
+            return row
+
+        return cls._make(row)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert Track to a dictionary."""
+        return self._asdict()
+
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> Track:
         """Create Track from a dictionary."""
         return cls(
-            index=int(data["index"]),
-            name=data["name"],
-            title=data["title"],
-            performer=data["performer"],
-            audio_url=data["audio_url"],
+            int(data["index"]),
+            data["name"],
+            data["title"],
+            data["performer"],
+            data["audio_url"],
         )
 
     @classmethod
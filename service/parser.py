@@ -0,0 +1,135 @@
+"""Playlist extractors turning a music page into tracks."""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+
+import lxml.html
+from bs4 import BeautifulSoup, Tag
+
+from .data import Track
+
+
+class PlaylistParser(ABC):
+    """Base class for playlist extractors."""
+
+    @abstractmethod
+    def parse(self, html: str) -> list[Track]:
+        """Extract tracks from the page."""
+
+
+class SoupPlaylistParser(PlaylistParser):
+    """Extractor building a full BeautifulSoup tree of the page."""
+
+    def parse(self, html: str) -> list[Track]:
+        """Extract tracks from the page."""
+        soup = BeautifulSoup(html, "html.parser")
+        playlist = soup.find("ul", class_="playlist")
+
+        if not isinstance(playlist, Tag):
+            msg = "Could not find playlist element"
+            raise TypeError(msg)
+
+        return [
+            Track.from_element(track_data, index)
+            for index, track_data in enumerate(playlist.find_all("li"))
+        ]
+
+
+class FastPlaylistParser(PlaylistParser):
+    """Extractor parsing only the playlist region of the page with lxml."""
+
+    PLAYLIST_START = 'class="playlist"'
+    PLAYLIST_END = "</ul>"
+
+    def __init__(self, fallback: PlaylistParser | None = None) -> None:
+        """Initialize the extractor with a parser for unexpected markup."""
+        self._fallback = fallback or SoupPlaylistParser()
+
+    def parse(self, html: str) -> list[Track]:
+        """Extract tracks from the page."""
+        region = self._playlist_region(html)
+
+        if region is None:
+            return self._fallback.parse(html)
+
+        try:
+            return self._parse_region(region)
+        except (TypeError, ValueError):
+            return self._fallback.parse(html)
+
+    def _playlist_region(self, html: str) -> str | None:
+        """Cut the playlist element out of the page without parsing it."""
+        marker = html.find(self.PLAYLIST_START)
+        if marker == -1:
+            return None
+
+        start = html.rfind("<ul", 0, marker)
+        end = html.find(self.PLAYLIST_END, marker)
+        if start == -1 or end == -1 or html.find(">", start) < marker:
+            return None
+
+        region = html[start : end + len(self.PLAYLIST_END)]
+
+        # A nested list would be cut short, let the full parser handle it.
+        if region.count("<ul") != 1:
+            return None
+
+        return region
+
+    @staticmethod
+    def _parse_region(region: str) -> list[Track]:
+        """Extract tracks from the playlist element."""
+        playlist = lxml.html.fragment_fromstring(region)
+        tracks = []
+
+        for index, item in enumerate(playlist.iterfind("li")):
+            performer = title = audio_url = None
+
+            for element in item.iter():
+                classes = element.get("class")
+                if not classes:
+                    continue
+
+                class_list = classes.split()
+                if performer is None and "playlist-name-artist" in class_list:
+                    performer = element.text_content().strip()
+                elif title is None and "playlist-name-title" in class_list:
+                    title = element.text_content().strip()
+                elif audio_url is None and "playlist-play" in class_list:
+                    audio_url = element.get("data-url", "")
+
+            if performer is None or title is None:
+                msg = "Could not find artist name element"
+                raise ValueError(msg)
+
+            if audio_url is None:
+                msg = "Could not find audio URL element"
+                raise TypeError(msg)
+
+            tracks.append(
+                Track(
+                    index=index,
+                    name=f"{performer} - {title}",
+                    title=title,
+                    performer=performer,
+                    audio_url=audio_url,
+                ),
+            )
+
+        return tracks
+
+
+PARSERS: dict[str, type[PlaylistParser]] = {
+    "fast": FastPlaylistParser,
+    "soup": SoupPlaylistParser,
+}
+
+
+def get_parser(name: str) -> PlaylistParser:
+    """Create the playlist extractor registered under the given name."""
+    try:
+        return PARSERS[name]()
+    except KeyError:
+        msg = f"Unknown playlist parser: {name}"
+        raise ValueError(msg) from None
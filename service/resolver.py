@@ -0,0 +1,41 @@
+"""Resolver connecting to a fixed address instead of looking hosts up."""
+
+from __future__ import annotations
+
+import socket
+
+from aiohttp.abc import AbstractResolver, ResolveResult
+
+
+class PinnedResolver(AbstractResolver):
+    """Resolve every host to the same address.
+
+    Used to send the music site's requests, including the search
+    subdomains, to a proxy or a local stand-in without touching DNS.
+    """
+
+    def __init__(self, address: str) -> None:
+        """Initialize the resolver with the address to connect to."""
+        self.address = address
+        self.family = socket.AF_INET6 if ":" in address else socket.AF_INET
+
+    async def resolve(
+        self,
+        host: str,
+        port: int = 0,
+        family: socket.AddressFamily = socket.AF_INET,  # noqa: ARG002
+    ) -> list[ResolveResult]:
+        """Return the pinned address for the host."""
+        return [
+            ResolveResult(
+                hostname=host,
+                host=self.address,
+                port=port,
+                family=self.family,
+                proto=0,
+                flags=socket.AI_NUMERICHOST,
+            ),
+        ]
+
+    async def close(self) -> None:
+        """Release the resolver, nothing is held."""
@@ -0,0 +1,253 @@
+"""Consistency of two bot processes sharing one database.
+
+Every replica is a separate process running the dispatcher built by
+``main.py`` against the fake Bot API and music site of the benchmarks, so
+the process-local caches are really apart. Needs the ``POSTGRES_*``
+settings of a local server, the tests are skipped without one.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import multiprocessing
+import os
+import socket
+import time
+import urllib.request
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from benchmarks.load import serve_stubs
+from benchmarks.suite import configure
+from benchmarks.updates import UpdateFactory
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from multiprocessing.connection import Connection
+
+TIMEOUT = 30
+FIRST_USER = 3_000_000
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("POSTGRES_DB"),
+    reason="needs a PostgreSQL server",
+)
+
+
+def free_port() -> int:
+    """Return a port nobody listens on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_replica(api_port: int, music_port: int, pipe: Connection) -> None:
+    """Run one bot process answering the commands sent through the pipe."""
+    configure(api_port, music_port)
+    os.environ.update(
+        {
+            "BOT_REPLICAS": "2",
+            "FSM_STORAGE": "postgres",
+            "HISTORY_FLUSH_INTERVAL": "0.5",
+            "USER_FLUSH_INTERVAL": "1",
+        },
+    )
+    asyncio.run(_serve_replica(pipe))
+
+
+async def _serve_replica(pipe: Connection) -> None:
+    from aiogram.fsm.storage.base import StorageKey
+    from aiogram.types import Update
+
+    import main
+    from benchmarks.load import KeyboardRecorder
+    from database.engine import init_db
+    from database.user_cache import user_cache
+
+    await init_db()
+    bot = await main.create_bot()
+    dp = await main.create_dispatcher(bot)
+    recorder = KeyboardRecorder()
+    bot.session.middleware(recorder)
+    await dp.emit_startup(bot=bot)
+
+    def storage_key(user_id: int) -> StorageKey:
+        return StorageKey(bot_id=bot.id, chat_id=user_id, user_id=user_id)
+
+    async def feed(update: dict[str, Any]) -> list[str]:
+        await dp.feed_update(bot, Update.model_validate(update))
+        chat = update.get("message") or update["callback_query"]["message"]
+        keyboard = recorder.keyboards.pop(chat["chat"]["id"], None)
+        if keyboard is None:
+            return []
+
+        return [
+            button.callback_data or ""
+            for row in keyboard.inline_keyboard
+            for button in row
+        ]
+
+    async def language(user_id: int) -> str | None:
+        user = user_cache.get(user_id)
+        return None if user is None else user.language_code
+
+    commands: dict[str, Callable[[Any], Any]] = {
+        "feed": feed,
+        "language": language,
+        "flush_users": lambda _: user_cache.flush(),
+        "set_data": lambda args: dp.storage.set_data(
+            storage_key(args[0]),
+            args[1],
+        ),
+        "get_data": lambda user_id: dp.storage.get_data(storage_key(user_id)),
+    }
+
+    try:
+        while True:
+            command, argument = await asyncio.to_thread(pipe.recv)
+            if command == "stop":
+                break
+            pipe.send(await commands[command](argument))
+    finally:
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
+        pipe.send(None)
+
+
+class Replica:
+    """Bot process controlled from the test."""
+
+    def __init__(self, api_port: int, music_port: int) -> None:
+        """Start the process."""
+        self._pipe, child = multiprocessing.Pipe()
+        self._process = multiprocessing.get_context("spawn").Process(
+            target=serve_replica,
+            args=(api_port, music_port, child),
+            daemon=True,
+        )
+        self._process.start()
+
+    def call(self, command: str, argument: Any = None) -> Any:  # noqa: ANN401
+        """Run the command in the process and return its result."""
+        self._pipe.send((command, argument))
+        if not self._pipe.poll(TIMEOUT):
+            msg = f"Replica did not answer {command}"
+            raise TimeoutError(msg)
+
+        return self._pipe.recv()
+
+    def stop(self) -> None:
+        """Shut the dispatcher down and wait for the process."""
+        if self._process.is_alive():
+            self.call("stop")
+        self._process.join(TIMEOUT)
+
+
+def wait_ready(url: str) -> None:
+    """Wait until the stub answers."""
+    deadline = time.monotonic() + TIMEOUT
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=1):  # noqa: S310
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+@pytest.fixture(scope="module")
+def replicas() -> Iterator[tuple[Replica, Replica]]:
+    """Start the stubs and two bot processes."""
+    api_port, music_port = free_port(), free_port()
+    stubs = multiprocessing.get_context("spawn").Process(
+        target=serve_stubs,
+        args=(api_port, music_port, 0.0, 1024),
+        daemon=True,
+    )
+    stubs.start()
+    wait_ready(f"http://127.0.0.1:{api_port}/stats")
+    wait_ready(f"http://127.0.0.1:{music_port}/stats")
+
+    started = [Replica(api_port, music_port) for _ in range(2)]
+    try:
+        yield started[0], started[1]
+    finally:
+        for replica in started:
+            replica.stop()
+        stubs.terminate()
+        stubs.join()
+
+
+@pytest.fixture(scope="module")
+def user_ids() -> Iterator[int]:
+    """Return ids of users that earlier runs did not create."""
+    return itertools.count(FIRST_USER + int(time.time()) % 100_000 * 10)
+
+
+@pytest.fixture(scope="module")
+def updates() -> UpdateFactory:
+    """Return the factory of the updates sent to both processes."""
+    return UpdateFactory()
+
+
+def test_search_is_visible_to_other_process(
+    replicas: tuple[Replica, Replica],
+    updates: UpdateFactory,
+    user_ids: Iterator[int],
+) -> None:
+    """A page of a search made in one process is served by the other."""
+    first, second = replicas
+    user_id = next(user_ids)
+    first.call("feed", updates.message(user_id, "/start"))
+
+    buttons = first.call("feed", updates.message(user_id, "replicas"))
+    search_id = buttons[0].split(":")[2]
+    # Sent right away, the search is usually still buffered by the first.
+    page = updates.callback(user_id, f"track:page:{search_id}:1")
+    buttons = second.call("feed", page)
+
+    assert buttons
+    assert all(
+        button.split(":")[2] == search_id
+        for button in buttons
+        if button.startswith("track:get:")
+    )
+
+
+def test_user_change_invalidates_other_process(
+    replicas: tuple[Replica, Replica],
+    updates: UpdateFactory,
+    user_ids: Iterator[int],
+) -> None:
+    """A language set in one process is seen by the other one."""
+    first, second = replicas
+    user_id = next(user_ids)
+    second.call("feed", updates.message(user_id, "/start"))
+    assert second.call("language", user_id) == "en"
+
+    first.call("feed", updates.message(user_id, "/start"))
+    first.call("feed", updates.callback(user_id, "language:set:ru"))
+    first.call("flush_users")
+
+    deadline = time.monotonic() + TIMEOUT
+    while second.call("language", user_id) is not None:
+        assert time.monotonic() < deadline, "user was not invalidated"
+        time.sleep(0.05)
+
+    second.call("feed", updates.message(user_id, "/start"))
+    assert second.call("language", user_id) == "ru"
+
+
+def test_fsm_data_is_shared(
+    replicas: tuple[Replica, Replica],
+    user_ids: Iterator[int],
+) -> None:
+    """FSM data written by one process is read by the other."""
+    first, second = replicas
+    user_id = next(user_ids)
+    first.call("set_data", (user_id, {"page": 2}))
+
+    assert second.call("get_data", user_id) == {"page": 2}